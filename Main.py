@@ -2,23 +2,49 @@
 # -*- coding: utf-8 -*-
 """
 An algorithmic trading bot for Coinex Perpetual Futures.
-Uses technical indicators from taapi.io to execute trades with risk management features.
+Uses technical indicators (computed locally from Coinex klines or fetched from taapi.io)
+to execute trades with risk management features. Any number of markets can be traded
+concurrently from a single process.
+
+The constants below are the defaults; a config file (config.toml, or --config) and
+COINEX_BOT_* environment variables override them, see config.py:
+
+    python Main.py --config config.toml --headless
 """
 
-import json
+import argparse
+import os
+import sys
 import time
-import datetime
-import logging
-import traceback
-import schedule
-import requests
-from termcolor import colored
+from concurrent.futures import ThreadPoolExecutor
 import api  # Custom API wrapper for Coinex
+from market_info import MarketMetadata  # Precisions and limits of every market
+from candle_store import CandleStore  # Kline history on disk for backtesting
+import config  # Config file and environment overrides
+import async_api  # asyncio API wrapper for concurrent reads
+from account_cache import AccountCache  # Balances, positions and orders shared by all markets
+import market_stream  # WebSocket ticker/depth/deals feed
+import strategy  # Trading rules shared with the backtester
+import trader  # Per-market trading logic
+from rate_limit import EndpointLimiter
+from resilience import EndpointBreakers
+from scheduler import CandleScheduler
+from risk_monitor import RiskMonitor
+from trader import log_status
 
 # ==============================================
 # CONFIGURATION SECTION
 # ==============================================
 
+# Markets to trade: [{'symbol': 'ETH/USDT', 'timeframe': '5m', 'leverage': 3, 'stoploss': 5,
+# 'indicator_values': [...]}, ...] or symbols only; empty asks for them at startup
+MARKETS = []
+
+# Config file read when present (--config overrides) and watched for changes: market
+# indicator values, stop-loss, leverage and STRATEGIES are reloaded without a restart
+CONFIG_FILE = 'config.toml'
+CONFIG_RELOAD_INTERVAL = 2.0
+
 # Coinex API Credentials
 ACCESS_ID = 'ACCESS_ID'
 SECRET_KEY = 'SECRET_KEY'
@@ -26,327 +52,307 @@ SECRET_KEY = 'SECRET_KEY'
 # taapi.io API Key for technical indicators
 INDICATOR_API_KEY = 'INDICATOR_API_KEY'
 
-# ==============================================
-# USER CONFIGURATION
-# ==============================================
+# Indicator source: 'local' computes indicators from Coinex klines in-process,
+# 'taapi' fetches them from taapi.io (slow, rate limited)
+INDICATOR_SOURCE = 'local'
 
-# Initialize bot with user preferences
-answer = int(input("Initiate default settings? (1=Yes, 0=No) "))
-market_indicator_api = input("Enter Market (e.g., ETH/USDT, BTC/USDT): ").upper()
-market = market_indicator_api.replace("/", "")
+# With taapi, fetch all indicators of a cycle in one bulk request (needs a taapi.io plan with
+# bulk queries); on failure they are fetched concurrently within the taapi.io rate limit
+INDICATOR_BULK = True
 
-"""
-DEFAULT SETTINGS:
-- Timeframe: 5m
-- Indicators: 
-  - MACD(14, 21, 15)
-  - SAR(0.02, 0.2) 
-  - ADX(24, 20.1)
-- Leverage: 3
-- Stoploss: 5% per trade
-"""
-if answer == 1:
-    indicator_values = [14, 21, 15, 0.02, 0.2, 24, 20.1]
-    leverage = 3
-    timeframe = '5m'
-    stoploss = 5
-else:
-    # Custom indicator parameters
-    indicator_values = [
-        input("MACD Fast Period: "),
-        input("MACD Slow Period: "),
-        input("MACD Signal Period: "),
-        input("SAR Acceleration: "),
-        input("SAR Maximum: "),
-        input("ADX Period: "),
-        float(input("ADX Level: "))
-    ]
-    leverage = int(input("Enter Leverage (3,5,8,10,15): "))
-    stoploss = int(input("Enter stoploss for each trade (% based): "))
-    timeframe = input("Enter Timeframe (5m,15m,30m,1h): ")
-
-# Initialize Coinex API connection
-robot = api.CoinexPerpetualApi(ACCESS_ID, SECRET_KEY)
-robot.adjust_leverage(market, 1, leverage)
-
-# Order amount truncation digits for different pairs
-TRUNCATE_DIGITS = {
-    "ETHUSDT": 3,
-    "BTCUSDT": 4,
-    "LTCUSDT": 1
+# Strategies evaluated on every market, set as [[strategies]] in the config file (see
+# config.strategies and signals.py); None runs the default MACD/SAR/ADX strategy with
+# each market's indicator values
+STRATEGIES = None
+
+# Checkpoint of the local indicator state per market, restored on restart (None disables)
+INDICATOR_STATE_FILE = 'indicator_state_{market}.json'
+
+# Coinex requests per second per endpoint class, shared by all markets
+RATE_LIMITS = {
+    'public': 20,   # Market data
+    'private': 10,  # Balances, positions, orders and deals
+    'order': 10     # Placing, cancelling and closing orders
 }
-truncate_digit = TRUNCATE_DIGITS.get(market, 2)  # Default to 2 if pair not specified
 
-# ==============================================
-# UTILITY FUNCTIONS
-# ==============================================
+# HTTP connection pool: connections kept per host (at least one per market), HTTP/2 through
+# httpx if installed, and connections opened with a ping at startup (0 disables)
+POOL_SIZE = 10
+HTTP2 = False
+WARM_CONNECTIONS = 2
 
-def truncate(number: float, digits: int) -> float:
-    """Truncate a number to specified decimal places without rounding."""
-    pow10 = 10 ** digits
-    return number * pow10 // 1 / pow10
+# Issue independent reads (deals, stop orders, balance, ticker) concurrently through
+# the asyncio client instead of one after another
+ASYNC_READS = True
 
-def log_status(message: str, color: str = 'white'):
-    """Log status messages with timestamp and colored output."""
-    timestamp = datetime.datetime.now().replace(microsecond=0)
-    print(colored(f"{message:10} {timestamp}", color), "\n", 70 * "-")
+# Read prices from Coinex's WebSocket feed kept in memory instead of polling REST
+MARKET_STREAM = True
+STREAM_URL = market_stream.WS_URL
 
-# ==============================================
-# TRADING FUNCTIONS
-# ==============================================
+# Keep balances, positions, stop orders and last deals in a cache refreshed once per
+# cycle for all markets and invalidated by our own order acks
+ACCOUNT_CACHE = True
 
-def risk_free():
-    """Implement risk-free trading by setting stop orders after price moves favorably."""
-    position_data = json.loads(json.dumps(robot.query_position_pending(market), indent=4))['data']
-    
-    if position_data != []:
-        open_price = float(position_data[0]['open_price'])
-        fresh_price = float(json.loads(json.dumps(robot.get_market_state(market), indent=4))['data']['ticker']['index_price'])
-        side = int(position_data[0]['side'])
-        amount = float(position_data[0]['amount'])
-
-        # For long positions, set stop above entry after 1.1% profit
-        if side == robot.ORDER_DIRECTION_BUY and fresh_price > open_price * 1.011:
-            stop_price = open_price * 1.0015  # 0.15% above entry
-            robot.put_stop_market_order(market, 1, amount, stop_price, 3)
-        
-        # For short positions, set stop below entry after 1.1% profit
-        elif side == robot.ORDER_DIRECTION_SELL and fresh_price < open_price * 0.989:
-            stop_price = open_price * 0.9985  # 0.15% below entry
-            robot.put_stop_market_order(market, 2, amount, stop_price, 3)
-
-def market_sell(market: str):
-    """Execute market sell order with 3% of account balance and set stoploss."""
-    deal_data = json.loads(json.dumps(robot.query_user_deals(market, 0, 1, 0), indent=4))
-    position_type = deal_data['data']['records'][0]['side']
-    stoploss_exist = int(json.loads(json.dumps(robot.query_stop_pending(market, 0, 0, 1)['data']['total'], indent=4)))
-    
-    if position_type == 2 or not stoploss_exist:
-        robot.cancel_all_stop_order(market)
-        
-        # Close opposite position if exists
-        position_id = json.loads(json.dumps(robot.query_user_deals(market, 0, 1, 2), indent=4)['data']['records'][0]['position_id'])
-        robot.close_market(market, position_id)
-        time.sleep(2)
-        
-        # Calculate order size (3% of available balance)
-        available = float(json.loads(json.dumps(robot.query_account(), indent=4))['data']['USDT']['available'])
-        index_price = float(json.loads(json.dumps(robot.get_market_state(market), indent=4))["data"]["ticker"]["index_price"])
-        order_amount = truncate((available * 0.03) / index_price * leverage, truncate_digit)
-        stop_price = index_price * (1 + stoploss / 100)
-      
-        # Place sell order and stoploss
-        robot.put_market_order(market, robot.ORDER_DIRECTION_SELL, order_amount)
-        robot.put_stop_market_order(market, 2, order_amount, stop_price, 3)
-
-def market_buy(market: str):
-    """Execute market buy order with 3% of account balance and set stoploss."""
-    deal_data = json.loads(json.dumps(robot.query_user_deals(market, 0, 1, 0), indent=4))
-    position_type = deal_data['data']['records'][0]['side']
-    stoploss_exist = int(json.loads(json.dumps(robot.query_stop_pending(market, 0, 0, 1)['data']['total'], indent=4)))
-    
-    if position_type == 1 or not stoploss_exist:
-        robot.cancel_all_stop_order(market)
-        
-        # Close opposite position if exists
-        position_id = json.loads(json.dumps(robot.query_user_deals(market, 0, 1, 1), indent=4)['data']['records'][0]['position_id'])
-        robot.close_market(market, position_id)
-        time.sleep(2)
-        
-        # Calculate order size (3% of available balance)
-        available = float(json.loads(json.dumps(robot.query_account(), indent=4))['data']['USDT']['available'])
-        index_price = float(json.loads(json.dumps(robot.get_market_state(market), indent=4))["data"]["ticker"]["index_price"])
-        order_amount = truncate((available * 0.03) / index_price * leverage, truncate_digit)
-        stop_price = index_price * (1 - stoploss / 100)
-
-        # Place buy order and stoploss
-        robot.put_market_order(market, robot.ORDER_DIRECTION_BUY, order_amount)
-        robot.put_stop_market_order(market, 1, order_amount, stop_price, 3)
+# Check break-even stops on every streamed price update (at most once per RISK_INTERVAL
+# seconds per market, polling at that rate without the stream) instead of once per candle
+RISK_MONITOR = True
+RISK_INTERVAL = 1.0
 
-# ==============================================
-# TECHNICAL INDICATOR FUNCTIONS
-# ==============================================
+# Seconds after each candle close to start a cycle, so the closed candle is served by the API
+CANDLE_CLOSE_DELAY = 0.5
 
-def get_indicator_data(indicator: str, params: dict) -> dict:
-    """Fetch indicator data from taapi.io API with error handling."""
-    endpoint = f"https://api.taapi.io/{indicator}"
-    params['secret'] = INDICATOR_API_KEY
-    params['exchange'] = 'binance'
-    params['symbol'] = market_indicator_api
-    params['interval'] = timeframe
-    
-    try:
-        time.sleep(5)  # Rate limiting
-        response = requests.get(endpoint, params=params)
-        response.raise_for_status()
-        return json.loads(response.text)
-    except requests.exceptions.RequestException as e:
-        logging.error(f"Error fetching {indicator} data: {str(e)}")
-        return None
-
-def macd() -> int:
-    """Get trading signal from MACD indicator."""
-    params = {
-        'backtracks': '3',
-        'optInFastPeriod': indicator_values[0],
-        'optInSlowPeriod': indicator_values[1],
-        'optInSignalPeriod': indicator_values[2]
-    }
-    time.sleep(15.5)
-    data = get_indicator_data("macd", params)
-    if not data:
-        return 0
-        
-    hist_current = float(data[1]['valueMACDHist'])
-    hist_previous = float(data[2]['valueMACDHist'])
-    
-    print(f"MACD: {hist_current:.4f} (Prev: {hist_previous:.4f})\n")
-    
-    # Buy signal when histogram crosses above zero
-    if hist_current > 0 > hist_previous:
-        return robot.ORDER_DIRECTION_BUY
-    # Sell signal when histogram crosses below zero
-    elif hist_current < 0 < hist_previous:
-        return robot.ORDER_DIRECTION_SELL
-    return 0
-
-def sar() -> int:
-    """Get trading signal from Parabolic SAR indicator."""
-    params_1 = {
-        'backtracks': '4',
-        'optInAcceleration': indicator_values[3],
-        'optInMaximum': indicator_values[4]
-    }
-    params_2 = {
-        'backtracks': '4'
-    }
-    time.sleep(15.5)
-    data_1 = get_indicator_data("sar", params_1)
-    if not data:
-        return 0
-    time.sleep(15.5)
-    data_2 = get_indicator_data("candle", params_2)
-    sar = float(json.loads(json.dumps(data_1.json(), indent=4))[1]['value'])
-    price = float(json.loads(json.dumps(params_2.json(), indent=4))[1]['close'])
-
-    print("SAR:", price, sar, "\n")
-    # Sell signal when SAR value is above price
-    if price < sar:
-        return robot.ORDER_DIRECTION_SELL
-    # Buy signal when SAR value is below price
-    elif price > sar:
-        return robot.ORDER_DIRECTION_BUY
-    return 0
-
-def adx() -> int:
-    """Get trading permission signal from ADX indicator."""
-    params = {
-        'backtracks': '3',
-        'optInTimePeriod': indicator_values[5]
-    }
-    time.sleep(15.5)
-    data = get_indicator_data("adx", params)
-    adx_value = float(json.loads(json.dumps(data.json(), indent=4))[1]['value'])
-
-    print("ADX:", adx_value, "\n")
-    # Permit trade if the trend is strong enough.
-    if adx_value > indicator_values[6]:
-        return 1
-    # Block trade if the trend is weak enough/market is in range.
-    else:
-        return 0
-# Extra ready to use indicators:
-def supertrend() -> int:
-    """Get trading signal from Supertrend indicator."""
-    params = {
-        'backtracks': '3',
-        'period': 15,
-        'multiplier': 10
-    }
-    
-    data = get_indicator_data("supertrend", params)
-    if not data:
-        return 0
-        
-    current_signal = data[1]['valueAdvice']
-    previous_signal = data[2]['valueAdvice']
-    
-    print(f"SUPERTREND: Current={current_signal}, Previous={previous_signal}\n")
-    
-    # Buy signal when trend changes from short to long
-    if current_signal == "long" and previous_signal == "short":
-        return 1
-    return 0
-
-def rsi() -> int:
-    """Get trading signal from RSI indicator."""
-    params = {
-        'backtracks': '3',
-        'optInTimePeriod': indicator_values[5]
-    }
-    
-    data = get_indicator_data("rsi", params)
-    if not data:
-        return 0
-        
-    rsi_value = float(data[1]['value'])
-    print(f"RSI: {rsi_value:.2f}\n")
-    
-    # Signal when RSI is between 30-70 (not overbought/sold)
-    return 1 if 30 < rsi_value < 70 else 0
+# Leverage last set per market, so restarts only adjust leverage that changed
+LEVERAGE_STATE_FILE = 'leverage_state.json'
+
+# Directory the closed klines fetched for local indicators are saved to, for backtesting
+# (None disables)
+CANDLE_STORE_DIR = 'candles'
+
+# Market precisions, multipliers and risk limits, persisted and fetched again after
+# MARKET_INFO_MAX_AGE seconds; order amounts and prices are rounded with them
+MARKET_INFO_FILE = 'market_info.json'
+MARKET_INFO_MAX_AGE = 86400
+
+# Skip entries whose slippage estimated from the order book exceeds this many bps (None disables)
+MAX_SLIPPAGE_BPS = None
 
 # ==============================================
-# TRADING STRATEGY
+# USER CONFIGURATION
 # ==============================================
 
-def signal_helper():
-    """Main trading strategy that combines indicators to generate signals."""
-    try:
-        risk_free()  # Manage risk for open positions
-        
-        # Get signals from indicators
-        macd_signal = macd()
-        sar_signal = sar()
-        adx_signal = adx()
-        
-        # Execute trades based on combined signals
-        if macd_signal == robot.ORDER_DIRECTION_BUY and sar_signal == robot.ORDER_DIRECTION_BUY and adx_signal:
-            market_buy(market)
-            log_status("BUY", 'green')
-        elif macd_signal == robot.ORDER_DIRECTION_SELL and sar_signal == robot.ORDER_DIRECTION_SELL and adx_signal:
-            market_sell(market)
-            log_status("SELL", 'red')
+def prompt_markets() -> list:
+    """Ask for the markets and their settings on the terminal."""
+    # Initialize bot with user preferences
+    answer = int(input("Initiate default settings? (1=Yes, 0=No) "))
+    symbols = [symbol.strip().upper() for symbol in
+               input("Enter Market(s), comma separated (e.g., ETH/USDT, BTC/USDT): ").split(",") if symbol.strip()]
+
+    """
+    DEFAULT SETTINGS:
+    - Timeframe: 5m
+    - Indicators: 
+      - MACD(14, 21, 15)
+      - SAR(0.02, 0.2) 
+      - ADX(24, 20.1)
+    - Leverage: 3
+    - Stoploss: 5% per trade
+    """
+    market_configs = []
+    for symbol in symbols:
+        if answer == 1:
+            indicator_values = list(strategy.DEFAULT_INDICATOR_VALUES)
+            leverage = 3
+            timeframe = '5m'
+            stoploss = 5
         else:
-            log_status("NO SIGNAL", 'yellow')
-            
-    except Exception as e:
-        logging.error(traceback.format_exc())
-        log_status("ERROR", 'red')
+            # Custom indicator parameters
+            print(f"Settings for {symbol}:")
+            indicator_values = [
+                input("MACD Fast Period: "),
+                input("MACD Slow Period: "),
+                input("MACD Signal Period: "),
+                input("SAR Acceleration: "),
+                input("SAR Maximum: "),
+                input("ADX Period: "),
+                float(input("ADX Level: "))
+            ]
+            leverage = int(input("Enter Leverage (3,5,8,10,15): "))
+            stoploss = int(input("Enter stoploss for each trade (% based): "))
+            timeframe = input("Enter Timeframe ({0}): ".format(",".join(trader.KLINE_TYPES)))
+        market_configs.append({
+            'symbol': symbol,
+            'indicator_values': indicator_values,
+            'leverage': leverage,
+            'stoploss': stoploss,
+            'timeframe': timeframe
+        })
+    return market_configs
+
+
+def defaults() -> dict:
+    """The configuration constants of this module."""
+    return {name: value for name, value in globals().items() if name.isupper()}
+
+
+def load_settings(args) -> dict:
+    path = args.config or (CONFIG_FILE if CONFIG_FILE and os.path.exists(CONFIG_FILE) else None)
+    settings = config.load_config(defaults(), path)
+    settings['CONFIG_FILE'] = path
+    if not settings['MARKETS']:
+        if args.headless or not sys.stdin.isatty():
+            raise config.ConfigError('No markets configured (MARKETS in the config file or COINEX_BOT_MARKETS)')
+        settings['MARKETS'] = config.markets(prompt_markets())
+    return settings
 
 # ==============================================
-# SCHEDULER SETUP
+# STARTUP
 # ==============================================
 
-# Configure schedule based on selected timeframe
-SCHEDULE_CONFIG = {
-    '5m': [
-        ':00', ':05', ':10', ':15', ':20', ':25', 
-        ':30', ':35', ':40', ':45', ':50', ':55'
-    ],
-    '15m': [':01', ':16', ':31', ':46'],
-    '30m': [':01', ':31'],
-    '1h': [':01']
-}
+class StartupTimer(object):
+    """Wall time of each startup phase."""
 
-for minute in SCHEDULE_CONFIG.get(timeframe, []):
-    schedule.every().hour.at(minute).do(signal_helper)
+    def __init__(self):
+        self.started = self.last = time.perf_counter()
+        self.phases = []
 
-# ==============================================
-# MAIN EXECUTION LOOP
-# ==============================================
+    def mark(self, name: str):
+        now = time.perf_counter()
+        self.phases.append((name, now - self.last))
+        self.last = now
 
-log_status("OPERATIONAL", 'green')
+    def summary(self) -> str:
+        phases = ', '.join(f"{name} {1000 * seconds:.0f}" for name, seconds in self.phases)
+        return f"Startup took {1000 * (self.last - self.started):.0f} ms ({phases})"
 
-while True:
-    schedule.run_pending()
-    time.sleep(1)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Trade Coinex perpetual markets.')
+    parser.add_argument('--config',
+                        help='TOML, YAML or JSON config file (default: {0} if present)'.format(CONFIG_FILE))
+    parser.add_argument('--headless', action='store_true', help='never prompt; fail if no markets are configured')
+    args = parser.parse_args(argv)
+
+    timer = StartupTimer()
+    try:
+        settings = load_settings(args)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    market_configs = settings['MARKETS']
+    timer.mark('config')
+
+    # Initialize one Coinex API connection (HTTP pool and rate limits) shared by all markets
+    rate_limiter = EndpointLimiter(settings['RATE_LIMITS'])
+    breakers = EndpointBreakers()  # Endpoints failing repeatedly are skipped for a while instead of timing out
+    pool_size = max(settings['POOL_SIZE'], len(market_configs))
+    robot = api.CoinexPerpetualApi(settings['ACCESS_ID'], settings['SECRET_KEY'], pool_size=pool_size,
+                                   rate_limiter=rate_limiter, breakers=breakers, http2=settings['HTTP2'])
+    loop_thread = async_api.EventLoopThread() if settings['ASYNC_READS'] or settings['MARKET_STREAM'] else None
+    async_robot = None
+    if settings['ASYNC_READS']:
+        async_robot = async_api.AsyncCoinexPerpetualApi(settings['ACCESS_ID'], settings['SECRET_KEY'],
+                                                        pool_size=pool_size * 4, rate_limiter=rate_limiter,
+                                                        breakers=breakers)
+    timer.mark('clients')
+
+    # Open the pooled connections (TCP + TLS) now rather than on the first trade
+    if settings['WARM_CONNECTIONS']:
+        print("HTTP pool:", robot.warm_up(max(settings['WARM_CONNECTIONS'], len(market_configs))))
+        if async_robot is not None:
+            print("Async HTTP pool:", loop_thread.run(async_robot.warm_up(settings['WARM_CONNECTIONS'])))
+        timer.mark('warm-up')
+
+    # One metadata load for all markets (from disk when recent), no per-order lookups
+    market_metadata = MarketMetadata(robot, settings['MARKET_INFO_FILE'], settings['MARKET_INFO_MAX_AGE']).load()
+    timer.mark('metadata')
+
+    markets = [market_config['symbol'].replace("/", "") for market_config in market_configs]
+    for market_config, market in zip(market_configs, markets):
+        info = market_metadata.get(market)
+        if info is None:
+            parser.error(f"Unknown market {market_config['symbol']}")
+        if info.leverages and int(market_config['leverage']) not in info.leverages:
+            parser.error(f"{market}: leverage {market_config['leverage']} not in {info.leverages}")
+    stream = None
+    if settings['MARKET_STREAM']:
+        stream = market_stream.MarketStream(markets, settings['STREAM_URL'])
+        stream.start(loop_thread)
+
+    account_cache = None
+    if settings['ACCOUNT_CACHE']:
+        account_cache = AccountCache(robot, markets, async_robot=async_robot, loop_thread=loop_thread)
+
+    candle_store = None
+    if settings['CANDLE_STORE_DIR']:
+        candle_store = CandleStore(root=settings['CANDLE_STORE_DIR'])
+
+    traders = []
+    for market_config in market_configs:
+        traders.append(trader.MarketTrader(
+            robot, market_config['symbol'], market_config['indicator_values'],
+            leverage=market_config['leverage'],
+            stoploss=market_config['stoploss'],
+            timeframe=market_config['timeframe'],
+            market_metadata=market_metadata,
+            indicator_source=settings['INDICATOR_SOURCE'],
+            indicator_bulk=settings['INDICATOR_BULK'],
+            indicator_api_key=settings['INDICATOR_API_KEY'],
+            state_file=settings['INDICATOR_STATE_FILE'],
+            async_robot=async_robot,
+            loop_thread=loop_thread,
+            market_stream=stream,
+            max_slippage_bps=settings['MAX_SLIPPAGE_BPS'],
+            account_cache=account_cache,
+            strategies=settings['STRATEGIES'],
+            candle_store=candle_store
+        ))
+    timer.mark('traders')
+
+    # One position query for all markets; only leverage that differs is adjusted
+    adjusted = trader.sync_leverage(robot, traders, settings['LEVERAGE_STATE_FILE'])
+    print("Leverage adjusted:", ", ".join(adjusted) if adjusted else "none needed")
+    timer.mark('leverage')
+
+    if settings['RISK_MONITOR']:
+        RiskMonitor(traders, market_stream=stream, interval=settings['RISK_INTERVAL']).start()
+
+    # Every market evaluates on its own worker, so a cycle takes as long as the slowest
+    # market rather than the sum of all of them
+    executor = ThreadPoolExecutor(max_workers=max(1, len(traders)))
+
+    def run_cycle(timeframe: str):
+        """Start signal evaluation for every market trading on `timeframe`."""
+        lateness = scheduler.lateness_stats()[timeframe]['last_ms']
+        print(f"{timeframe} cycle started {lateness:.1f} ms after its candle close\n")
+        cache = trader.indicator_cache.stats()
+        print(f"Indicator cache: {cache['hits']} hits, {cache['misses']} misses, {cache['size']} entries\n")
+        due = [market_trader for market_trader in traders if market_trader.timeframe == timeframe]
+        if account_cache is not None:
+            # One batched account poll for the markets of this timeframe only
+            account_cache.refresh([market_trader.market for market_trader in due])
+        for market_trader in due:
+            executor.submit(market_trader.signal_helper)
+
+    def reload(new_settings: dict):
+        """Apply a changed config file to the running traders."""
+        configs = {market_config['symbol'].replace("/", ""): market_config
+                   for market_config in new_settings['MARKETS']}
+        if configs and set(configs) != set(markets):
+            log_status("MARKETS CHANGED: RESTART TO APPLY", 'yellow')
+        for market_trader in traders:
+            market_config = configs.get(market_trader.market)
+            if market_config is not None:
+                market_trader.reconfigure(indicator_values=market_config['indicator_values'],
+                                          strategies=new_settings['STRATEGIES'],
+                                          stoploss=market_config['stoploss'],
+                                          leverage=market_config['leverage'])
+        trader.sync_leverage(robot, traders, settings['LEVERAGE_STATE_FILE'])
+        log_status("CONFIG RELOADED", 'cyan')
+
+    if settings['CONFIG_FILE']:
+        config.ConfigWatcher(settings['CONFIG_FILE'], defaults(), reload,
+                             interval=settings['CONFIG_RELOAD_INTERVAL']).start()
+
+    # ==============================================
+    # SCHEDULER SETUP
+    # ==============================================
+
+    # Trigger each timeframe right after its candle closes; cycles run on worker threads, so
+    # a slow one never delays the next trigger
+    scheduler = CandleScheduler(delay=settings['CANDLE_CLOSE_DELAY'])
+    for timeframe in sorted(set(market_trader.timeframe for market_trader in traders)):
+        scheduler.every(trader.KLINE_TYPES[timeframe], run_cycle, timeframe, name=timeframe)
+    scheduler.every('1hour', market_metadata.refresh_if_stale, name='market metadata')
+    timer.mark('scheduler')
+
+    # ==============================================
+    # MAIN EXECUTION LOOP
+    # ==============================================
+
+    print(timer.summary())
+    log_status("OPERATIONAL", 'green')
+
+    scheduler.run_forever()
+
+
+if __name__ == "__main__":
+    main()
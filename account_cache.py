@@ -0,0 +1,158 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Local cache of account state: balances, open positions, stop orders and the
+last deal per market.
+
+`refresh()` reloads everything in one batched poll (concurrently when an
+async client is configured) and is meant to run once per cycle for the
+markets of that cycle. Our own order acks invalidate the affected entries via
+`on_order_ack()`; the next read of an invalidated entry fetches just that
+piece again. Trading logic reads from here instead of issuing 5-7 sequential
+REST calls per decision. An entry whose fetch failed is unknown, and its
+readers return None rather than a default that looks like real state.
+"""
+
+import logging
+import threading
+import time
+
+from models import Account, Deal, Position, StopOrder
+
+
+class AccountCache(object):
+
+    def __init__(self, robot, markets, async_robot=None, loop_thread=None, max_age=None, logger=None):
+        """
+        # params:
+            robot         api.CoinexPerpetualApi used for reads
+            markets       markets whose stop orders and deals are cached
+            async_robot   optional async_api.AsyncCoinexPerpetualApi (with `loop_thread`) to batch reads
+            max_age       seconds after which any entry is refetched on read (None = until invalidated)
+        """
+        self.robot = robot
+        self.markets = [market.upper() for market in markets]
+        self.async_robot = async_robot
+        self.loop_thread = loop_thread
+        self.max_age = max_age
+        self.logger = logger or logging
+        self._values = {}
+        self._updated = {}
+        self._lock = threading.Lock()
+
+    # ==============================================
+    # FETCHING
+    # ==============================================
+
+    @staticmethod
+    def _calls(key):
+        """API call that loads a cache entry."""
+        if key == 'account':
+            return 'query_account', ()
+        if key == 'positions':
+            return 'query_position_pending', ()
+        kind, market = key
+        if kind == 'stops':
+            return 'query_stop_pending', (market, 0, 0, 1)
+        return 'query_user_deals', (market, 0, 1, 0)
+
+    def _fetch(self, keys):
+        calls = [self._calls(key) for key in keys]
+        if self.async_robot is not None:
+            responses = self.loop_thread.gather(*(getattr(self.async_robot, name)(*args) for name, args in calls))
+        else:
+            responses = [getattr(self.robot, name)(*args) for name, args in calls]
+        now = time.monotonic()
+        with self._lock:
+            for key, response in zip(keys, responses):
+                if not response or response.get('code') != 0:
+                    self.logger.error('Refreshing {0} failed: {1}'.format(key, response))
+                    self._values.pop(key, None)
+                    self._updated.pop(key, None)
+                    continue
+                self._values[key] = self._parse(key, response['data'])
+                self._updated[key] = now
+
+    @staticmethod
+    def _parse(key, data):
+        if key == 'account':
+            return Account.parse(data)
+        if key == 'positions':
+            positions = {}
+            for position in Position.parse_list(data):
+                positions.setdefault(position.market, []).append(position)
+            return positions
+        kind = key[0]
+        if kind == 'deals':
+            return [Deal(record) for record in (data.get('records') or [])[:1]]
+        return {'total': int(data.get('total', 0)), 'records': StopOrder.parse_list(data.get('records'))}
+
+    def refresh(self, markets=None):
+        """
+        Reload balances, positions and the stop orders and last deal of `markets` (default: all)
+        in one batch; other markets keep their entries until invalidated.
+        """
+        keys = ['account', 'positions']
+        for market in self.markets if markets is None else [market.upper() for market in markets]:
+            keys.extend([('stops', market), ('deals', market)])
+        self._fetch(keys)
+
+    def _get(self, key):
+        with self._lock:
+            updated = self._updated.get(key)
+            fresh = updated is not None and (self.max_age is None or time.monotonic() - updated <= self.max_age)
+        if not fresh:
+            self._fetch([key])
+        with self._lock:
+            return self._values.get(key)
+
+    # ==============================================
+    # INVALIDATION
+    # ==============================================
+
+    def invalidate(self, market=None):
+        """Drop cached state touched by activity on `market` (everything if None)."""
+        with self._lock:
+            if market is None:
+                self._updated.clear()
+                return
+            market = market.upper()
+            for key in ('account', 'positions', ('stops', market), ('deals', market)):
+                self._updated.pop(key, None)
+
+    def on_order_ack(self, market, response):
+        """Record the exchange's answer to one of our orders; returns the response unchanged."""
+        self.invalidate(market)
+        return response
+
+    # ==============================================
+    # READERS
+    # ==============================================
+
+    def available(self, asset='USDT'):
+        """Available balance of `asset` (0 if the account holds none), None if unknown."""
+        accounts = self._get('account')
+        if accounts is None:
+            return None
+        account = accounts.get(asset)
+        if account is None or account.available is None:
+            return 0
+        return account.available
+
+    def positions(self, market) -> list:
+        """Open models.Position entries of `market`, None if unknown."""
+        positions = self._get('positions')
+        return None if positions is None else positions.get(market.upper(), [])
+
+    def stop_order_count(self, market) -> int:
+        stops = self._get(('stops', market.upper()))
+        return None if stops is None else stops['total']
+
+    def stop_orders(self, market) -> list:
+        """Pending models.StopOrder entries of `market` (the first page), None if unknown."""
+        stops = self._get(('stops', market.upper()))
+        return None if stops is None else stops['records']
+
+    def recent_deals(self, market) -> list:
+        """[most recent models.Deal of `market`] ([] before its first deal), None if unknown."""
+        return self._get(('deals', market.upper()))
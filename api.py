@@ -1,6 +1,9 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from request_client import RequestClient
 
 
@@ -14,8 +17,12 @@ class CoinexPerpetualApi(object):
     POSITION_TYPE_ISOLATED = 1
     POSITION_TYPE_CROSS_MARGIN = 2
 
-    def __init__(self, access_id, secret_key, logger=None):
-        self.request_client = RequestClient(access_id, secret_key, logger)
+    # Relative difference within which a pending stop matches the one we sent; the exchange
+    # stores prices and amounts rounded to the market's precision
+    STOP_MATCH_TOLERANCE = 1e-4
+
+    def __init__(self, access_id, secret_key, logger=None, **client_options):
+        self.request_client = RequestClient(access_id, secret_key, logger, **client_options)
 
     # System API
     def ping(self):
@@ -32,6 +39,15 @@ class CoinexPerpetualApi(object):
         path = '/v1/ping'
         return self.request_client.get(path, sign=False)
 
+    def warm_up(self, connections=1):
+        """
+        Open `connections` pooled connections (TCP + TLS) ahead of trading by
+        sending that many pings at once; returns the pool statistics.
+        """
+        with ThreadPoolExecutor(max_workers=max(1, connections)) as executor:
+            list(executor.map(lambda _: self.ping(), range(connections)))
+        return self.request_client.pool_stats()
+
     # Market API
     def get_market_info(self):
         """
@@ -525,6 +541,136 @@ class CoinexPerpetualApi(object):
         }
         return self.request_client.post(path, data)
 
+    # Order batches
+    def put_orders(self, orders):
+        """
+        Submit related orders together. Coinex's perpetual API has no batch
+        endpoint for market or stop orders, so every leg is its own POST and
+        the legs are sent concurrently.
+        # params:
+            orders	list	(method name, args) pairs, e.g. ('put_market_order', (market, side, amount))
+        # Response
+            list of responses in the order of `orders`
+        """
+        with ThreadPoolExecutor(max_workers=max(1, len(orders))) as executor:
+            return list(executor.map(lambda order: getattr(self, order[0])(*order[1]), orders))
+
+    @classmethod
+    def bracket_orders(cls, market, side, amount, stop_price, take_profit_price=None, stop_type=3):
+        """Legs of an entry: a market order plus stop-loss (and take-profit) stop orders on the closing side."""
+        close_side = cls.ORDER_DIRECTION_SELL if side == cls.ORDER_DIRECTION_BUY else cls.ORDER_DIRECTION_BUY
+        orders = [
+            ('put_market_order', (market, side, amount)),
+            ('put_stop_market_order', (market, close_side, amount, stop_price, stop_type))
+        ]
+        if take_profit_price is not None:
+            orders.append(('put_stop_market_order', (market, close_side, amount, take_profit_price, stop_type)))
+        return orders
+
+    @classmethod
+    def match_stop_orders(cls, orders, records):
+        """Pending stop record for each stop leg of `orders` (None where it is missing); each record matches once."""
+        def close(value, expected):
+            return abs(float(value) - expected) <= abs(expected) * cls.STOP_MATCH_TOLERANCE
+
+        records = list(records)
+        matched = []
+        for name, args in orders:
+            if name != 'put_stop_market_order':
+                continue
+            side, amount, stop_price = args[1], float(args[2]), float(args[3])
+            record = next((record for record in records if int(record['side']) == side and
+                           close(record['amount'], amount) and close(record['stop_price'], stop_price)), None)
+            if record is not None:
+                records.remove(record)
+            matched.append(record)
+        return matched
+
+    def put_bracket_order(self, market, side, amount, stop_price, take_profit_price=None, stop_type=3):
+        """
+        Enter with a market order and submit its protective stop orders at the same time, then reconcile.
+        # params:
+            side	Integer	1 sell, 2 buy
+            stop_price	String	stop-loss trigger price
+            take_profit_price	String	optional take-profit trigger price
+        # Response
+        {
+            "ok": True,           # entry accepted and every stop confirmed pending
+            "entry": {...},       # put_market_order response
+            "status": {...},      # query_order_status response of the entry
+            "stops": [{...}],     # confirmed stop_pending records, None where missing
+            "resubmitted": 0,     # stops sent again because they did not land
+            "cancelled": 0        # stops cancelled because the entry was rejected
+        }
+        """
+        orders = self.bracket_orders(market, side, amount, stop_price, take_profit_price, stop_type)
+        return self.reconcile_orders(market, orders, self.put_orders(orders))
+
+    def reconcile_orders(self, market, orders, responses):
+        """
+        Confirm that every leg of a bracket landed: look up the entry's status and
+        find each stop among the pending stop orders. A missing stop is sent once
+        more if the entry went through; if the entry was rejected, stops that did
+        land are cancelled so they cannot open a position on their own.
+        """
+        entry = responses[0]
+        entry_ok = bool(entry) and entry.get('code') == 0
+        status = None
+        if entry_ok and entry['data'].get('order_id'):
+            status = self.query_order_status(market, entry['data']['order_id'])
+        pending = self.query_stop_pending(market, 0, 0, 100)
+        if not pending or pending.get('code') != 0:
+            return {'ok': False, 'entry': entry, 'status': status, 'stops': None, 'resubmitted': 0, 'cancelled': 0}
+        stops = self.match_stop_orders(orders, pending['data'].get('records') or [])
+        stop_orders = [order for order in orders if order[0] == 'put_stop_market_order']
+
+        resubmitted = cancelled = 0
+        if entry_ok:
+            missing = [order for order, record in zip(stop_orders, stops) if record is None]
+            if missing:
+                self.put_orders(missing)
+                resubmitted = len(missing)
+                pending = self.query_stop_pending(market, 0, 0, 100)
+                if pending and pending.get('code') == 0:
+                    stops = self.match_stop_orders(orders, pending['data'].get('records') or [])
+        else:
+            for record in stops:
+                if record is not None:
+                    self.cancel_stop_order(market, record['order_id'])
+                    cancelled += 1
+            stops = [None] * len(stops)
+
+        ok = entry_ok and all(record is not None for record in stops)
+        return {'ok': ok, 'entry': entry, 'status': status, 'stops': stops,
+                'resubmitted': resubmitted, 'cancelled': cancelled}
+
+    # Order completion
+    @staticmethod
+    def order_filled(response) -> bool:
+        """Whether a query_order_status response shows the order fully filled ("status": "done" or nothing left)."""
+        if not response or response.get('code') != 0:
+            return False
+        data = response['data']
+        return data.get('status') == 'done' or ('left' in data and float(data['left']) == 0)
+
+    def wait_for_order(self, market, order_id, timeout=5.0, interval=0.05, max_interval=0.5):
+        """
+        Poll query_order_status, starting every `interval` seconds and backing off to
+        `max_interval`, until the order is filled.
+        # Response
+            the query_order_status response of the filled order, or None after `timeout` seconds
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            response = self.query_order_status(market, order_id)
+            if self.order_filled(response):
+                return response
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            time.sleep(min(interval, remaining))
+            interval = min(interval * 2, max_interval)
+
     def close_limit(self, market, position_id, amount, price, effect_type=None):
         """
         # params:
@@ -0,0 +1,113 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import asyncio
+import threading
+import time
+
+from api import CoinexPerpetualApi
+from async_request_client import AsyncRequestClient
+
+
+class AsyncCoinexPerpetualApi(CoinexPerpetualApi):
+    """
+    Coinex perpetual API with the exact method surface of CoinexPerpetualApi,
+    where every method returns an awaitable.
+
+    The endpoint methods only build a path and parameters and hand them to
+    `self.request_client`; with an AsyncRequestClient that call returns a
+    coroutine, so independent reads can be run together:
+
+        deals, stops = await asyncio.gather(
+            api.query_user_deals(market, 0, 1, 0),
+            api.query_stop_pending(market, 0, 0, 1))
+    """
+
+    def __init__(self, access_id, secret_key, logger=None, **client_options):
+        self.request_client = AsyncRequestClient(access_id, secret_key, logger, **client_options)
+
+    async def put_orders(self, orders):
+        return await asyncio.gather(*(getattr(self, name)(*args) for name, args in orders))
+
+    async def put_bracket_order(self, market, side, amount, stop_price, take_profit_price=None, stop_type=3):
+        orders = self.bracket_orders(market, side, amount, stop_price, take_profit_price, stop_type)
+        return await self.reconcile_orders(market, orders, await self.put_orders(orders))
+
+    async def reconcile_orders(self, market, orders, responses):
+        """Same reconciliation as CoinexPerpetualApi.reconcile_orders, with the status and stop reads overlapped."""
+        entry = responses[0]
+        entry_ok = bool(entry) and entry.get('code') == 0
+        reads = [self.query_stop_pending(market, 0, 0, 100)]
+        if entry_ok and entry['data'].get('order_id'):
+            reads.append(self.query_order_status(market, entry['data']['order_id']))
+        results = await asyncio.gather(*reads)
+        pending, status = results[0], results[1] if len(results) > 1 else None
+        if not pending or pending.get('code') != 0:
+            return {'ok': False, 'entry': entry, 'status': status, 'stops': None, 'resubmitted': 0, 'cancelled': 0}
+        stops = self.match_stop_orders(orders, pending['data'].get('records') or [])
+        stop_orders = [order for order in orders if order[0] == 'put_stop_market_order']
+
+        resubmitted = cancelled = 0
+        if entry_ok:
+            missing = [order for order, record in zip(stop_orders, stops) if record is None]
+            if missing:
+                await self.put_orders(missing)
+                resubmitted = len(missing)
+                pending = await self.query_stop_pending(market, 0, 0, 100)
+                if pending and pending.get('code') == 0:
+                    stops = self.match_stop_orders(orders, pending['data'].get('records') or [])
+        else:
+            landed = [record for record in stops if record is not None]
+            await asyncio.gather(*(self.cancel_stop_order(market, record['order_id']) for record in landed))
+            cancelled = len(landed)
+            stops = [None] * len(stops)
+
+        ok = entry_ok and all(record is not None for record in stops)
+        return {'ok': ok, 'entry': entry, 'status': status, 'stops': stops,
+                'resubmitted': resubmitted, 'cancelled': cancelled}
+
+    async def wait_for_order(self, market, order_id, timeout=5.0, interval=0.05, max_interval=0.5):
+        deadline = time.monotonic() + timeout
+        while True:
+            response = await self.query_order_status(market, order_id)
+            if self.order_filled(response):
+                return response
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            await asyncio.sleep(min(interval, remaining))
+            interval = min(interval * 2, max_interval)
+
+    async def warm_up(self, connections=1):
+        await asyncio.gather(*(self.ping() for _ in range(connections)))
+        return self.request_client.pool_stats()
+
+    async def close(self):
+        await self.request_client.close()
+
+
+class EventLoopThread(object):
+    """
+    Runs an asyncio event loop in a daemon thread so synchronous code (the
+    threaded MarketTraders) can submit coroutines to one long-lived loop and
+    keep the AsyncRequestClient's connection pool warm between calls.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name='async-api', daemon=True)
+        self._thread.start()
+
+    def run(self, coroutine, timeout=None):
+        """Run `coroutine` on the loop and block until its result is available."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout)
+
+    def gather(self, *awaitables, timeout=None):
+        """Run awaitables concurrently and return their results in order."""
+        async def _gather():
+            return await asyncio.gather(*awaitables)
+        return self.run(_gather(), timeout)
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
@@ -0,0 +1,132 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import asyncio
+import logging
+import time
+import traceback
+
+import aiohttp
+
+import fast_json
+import resilience
+from http_pool import PoolStats
+from rate_limit import EndpointLimiter, endpoint_class
+from request_client import RequestClient, RequestSigner
+
+
+class AsyncRequestClient(object):
+    """
+    asyncio counterpart of RequestClient built on aiohttp.
+
+    get()/post() take the same arguments and return the same parsed payloads
+    (or None on failure) as RequestClient, but are coroutines. A single
+    ClientSession with a keep-alive connection pool is created lazily inside
+    the running event loop and reused for every request.
+    """
+
+    def __init__(self, access_id, secret_key, logger=None, debug=False, pool_size=10,
+                 rate_limiter=None, rate_limits=None, breakers=None, max_retries=2, backoff_base=0.25,
+                 backoff_cap=2.0, keepalive_timeout=60, limit_per_host=0):
+        self.access_id = access_id
+        self.secret_key = secret_key
+        self.headers = RequestClient.DEFAULT_HEADERS
+        self.signer = RequestSigner(access_id, secret_key, self.headers)
+        self.host = 'https://api.coinex.com/perpetual'
+        self.logger = logger or logging
+        self.rate_limiter = rate_limiter or EndpointLimiter(rate_limits)
+        self.breakers = breakers or resilience.EndpointBreakers()
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.pool_size = pool_size
+        self.keepalive_timeout = keepalive_timeout
+        self.limit_per_host = limit_per_host
+        self.stats = PoolStats()
+        self.http_client = None
+
+    def _trace_config(self):
+        """Feed request and new-connection events into self.stats (aiohttp times TCP and TLS together)."""
+        stats = self.stats
+
+        async def on_request_start(session, context, params):
+            stats.record_request()
+
+        async def on_connection_create_start(session, context, params):
+            context.connect_started = time.perf_counter()
+
+        async def on_connection_create_end(session, context, params):
+            stats.record_connection(time.perf_counter() - context.connect_started)
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_connection_create_start.append(on_connection_create_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        return trace_config
+
+    async def _session(self):
+        if self.http_client is None or self.http_client.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, limit_per_host=self.limit_per_host,
+                                             keepalive_timeout=self.keepalive_timeout)
+            self.http_client = aiohttp.ClientSession(connector=connector, trace_configs=[self._trace_config()])
+        return self.http_client
+
+    def pool_stats(self) -> dict:
+        return self.stats.as_dict()
+
+    async def close(self):
+        if self.http_client is not None and not self.http_client.closed:
+            await self.http_client.close()
+
+    async def _request(self, method, path, params, sign, timeout, retries):
+        url = self.host + path
+        breaker = self.breakers.get(path)
+        payload = None
+        for attempt in range(retries + 1):
+            if not breaker.allow():
+                self.logger.error('{0} {1} skipped: endpoint circuit is open'.format(method, url))
+                return payload
+            if attempt:
+                await asyncio.sleep(resilience.backoff_delay(attempt, self.backoff_base, self.backoff_cap))
+            await self.rate_limiter.acquire_async(endpoint_class(method, sign))
+            encoded, headers = self.signer.prepare(params, sign)
+            request = {} if method == 'GET' else {'data': encoded}
+            try:
+                session = await self._session()
+                target = url + '?' + encoded if method == 'GET' else url
+                async with session.request(method, target, headers=headers,
+                                           timeout=aiohttp.ClientTimeout(total=timeout), **request) as response:
+                    if response.status == 200:
+                        payload = fast_json.loads(await response.read())
+                        outcome = resilience.classify_response(payload)
+                    else:
+                        self.logger.error(
+                            'URL: {0}\nSTATUS_CODE: {1}\nResponse: {2}'.format(
+                                response.url,
+                                response.status,
+                                await response.text()
+                            )
+                        )
+                        payload = None
+                        outcome = resilience.classify_status(response.status)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                trace_info = traceback.format_exc()
+                self.logger.error('{method} {url} failed: \n{trace_info}'.format(
+                    method=method, url=url, trace_info=trace_info))
+                payload = None
+                outcome = resilience.RETRY
+            breaker.record(outcome)
+            if outcome == resilience.FATAL:
+                self.logger.error('{0} {1} rejected credentials: {2}'.format(method, url, payload))
+            if outcome != resilience.RETRY:
+                break
+        return payload
+
+    async def get(self, path, params=None, sign=True):
+        return await self._request('GET', path, params, sign, timeout=5, retries=self.max_retries)
+
+    async def post(self, path, data=None):
+        # Order writes are not idempotent, so a failed POST is never sent again
+        return await self._request('POST', path, data, True, timeout=10, retries=0)
@@ -0,0 +1,251 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Event-driven backtester for the default strategy.
+
+Stored candles are replayed bar by bar with the same rules the live bot uses
+(see strategy.py):
+- intrabar: an open position is stopped out when the bar's low/high reaches
+  the stop (filled at the stop, or at the open if the bar gaps through it);
+- at the close: the break-even rule of `risk_free()` is evaluated, then the
+  MACD/SAR/ADX signal of the just-closed bar decides whether to reverse or
+  open a position at the close price, sized like `market_buy`/`market_sell`.
+
+Indicators are computed with the vectorized functions in indicators.py and
+cached per parameter set, so a run that only changes e.g. the ADX level or
+the stop-loss reuses the MACD/SAR/ADX series of earlier runs.
+
+`run(strategies=...)` replays signals.Strategy objects instead, the same ones
+MarketTrader trades live, fed from the series of the indicators they need.
+"""
+
+import argparse
+import time
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+import indicators
+import signals
+import strategy
+
+Trade = namedtuple('Trade', [
+    'side', 'entry_time', 'entry_price', 'exit_time', 'exit_price', 'amount', 'pnl', 'reason'
+])
+
+
+class BacktestResult(object):
+
+    def __init__(self, trades, times, equity, initial_balance):
+        self.trades = trades
+        self.times = times
+        self.equity = equity
+        self.initial_balance = initial_balance
+
+    @property
+    def pnl(self) -> float:
+        return float(self.equity[-1] - self.initial_balance) if self.equity.size else 0.0
+
+    @property
+    def return_pct(self) -> float:
+        return 100.0 * self.pnl / self.initial_balance
+
+    @property
+    def max_drawdown(self) -> float:
+        """Largest peak-to-trough equity decline, in percent of the peak."""
+        if not self.equity.size:
+            return 0.0
+        peak = np.maximum.accumulate(self.equity)
+        return float(100.0 * np.max((peak - self.equity) / peak))
+
+    @property
+    def win_rate(self) -> float:
+        if not self.trades:
+            return 0.0
+        return 100.0 * sum(1 for trade in self.trades if trade.pnl > 0) / len(self.trades)
+
+    def summary(self) -> dict:
+        return {
+            'trades': len(self.trades),
+            'pnl': round(self.pnl, 4),
+            'return_pct': round(self.return_pct, 4),
+            'max_drawdown_pct': round(self.max_drawdown, 4),
+            'win_rate_pct': round(self.win_rate, 2),
+            'final_balance': round(float(self.equity[-1]) if self.equity.size else self.initial_balance, 4)
+        }
+
+
+class Backtester(object):
+
+    def __init__(self, candles, initial_balance=1000.0, fee=0.0, truncate_digit=2, cache_size=64):
+        """
+        # params:
+            candles          dict of column arrays (CandleStore.load / indicators.candles_from_kline)
+            initial_balance  starting USDT balance
+            fee              taker fee rate charged on entry and exit notional, e.g. 0.0005
+            truncate_digit   order amount decimals, the market's amount_prec (see market_info.py)
+            cache_size       indicator series kept in memory (LRU), keyed by indicator parameters
+        """
+        self.candles = {name: np.asarray(values) for name, values in candles.items()}
+        self.initial_balance = float(initial_balance)
+        self.fee = float(fee)
+        self.truncate_digit = truncate_digit
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _cached(self, key, compute):
+        """Return the indicator series for `key`, computing it on a miss."""
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            return self._cache[key]
+        self.cache_misses += 1
+        value = compute()
+        self._cache[key] = value
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return value
+
+    def macd_hist(self, fast, slow, signal) -> list:
+        key = ('macd', int(fast), int(slow), int(signal))
+        return self._cached(key, lambda: indicators.macd(self.candles['close'], fast, slow, signal)[2].tolist())
+
+    def sar(self, acceleration, maximum) -> list:
+        key = ('sar', float(acceleration), float(maximum))
+        return self._cached(key, lambda: indicators.parabolic_sar(
+            self.candles['high'], self.candles['low'], acceleration, maximum).tolist())
+
+    def adx(self, period) -> list:
+        key = ('adx', int(period))
+        return self._cached(key, lambda: indicators.adx(
+            self.candles['high'], self.candles['low'], self.candles['close'], period).tolist())
+
+    def series(self, indicator) -> list:
+        """Series of a signals.Indicator, shared with the default strategy's cache entries."""
+        key = (indicator.name,) + indicator.params
+        return self._cached(key, lambda: indicator.series(self.candles).tolist())
+
+    def strategy_signal(self, strategies):
+        """signal_at(i, close) evaluating `strategies` on the indicators of bar i."""
+        series = [(spec, self.series(spec)) for spec in signals.dependencies(strategies)]
+        Value, Snapshot, decide = signals.Value, signals.Snapshot, signals.decide
+
+        def signal_at(i, price):
+            return decide(strategies, Snapshot(price, {spec: Value(values[i], values[i - 1])
+                                                       for spec, values in series}))
+        return signal_at
+
+    def run(self, indicator_values=None, leverage=3, stoploss=5, strategies=None) -> BacktestResult:
+        """
+        Replay all candles with the given strategy parameters (same layout as Main.py),
+        or with `strategies` (signals.Strategy list) when given.
+        """
+        signal_at = None
+        if strategies is None:
+            values = list(indicator_values or strategy.DEFAULT_INDICATOR_VALUES)
+            hist = self.macd_hist(values[0], values[1], values[2])
+            sar = self.sar(values[3], values[4])
+            adx = self.adx(values[5])
+            adx_level = float(values[6])
+        else:
+            signal_at = self.strategy_signal(strategies)
+
+        times, opens, closes, highs, lows = self._cached(
+            ('candles',), lambda: [self.candles[name].tolist() for name in ('time', 'open', 'close', 'high', 'low')])
+
+        buy, sell = strategy.ORDER_DIRECTION_BUY, strategy.ORDER_DIRECTION_SELL
+        macd_signal, sar_signal = strategy.macd_signal, strategy.sar_signal
+        adx_signal, combine_signals = strategy.adx_signal, strategy.combine_signals
+        fee, digits = self.fee, self.truncate_digit
+
+        balance = self.initial_balance
+        trades = []
+        equity = [balance] * len(closes)
+        side = 0
+        entry_price = entry_time = amount = stop = 0.0
+
+        def close_position(timestamp, price, reason):
+            pnl = (price - entry_price) * amount if side == buy else (entry_price - price) * amount
+            pnl -= fee * price * amount
+            trades.append(Trade(side, entry_time, entry_price, timestamp, price, amount, pnl, reason))
+            return pnl
+
+        for i in range(1, len(closes)):
+            price = closes[i]
+
+            # Stop orders trigger inside the bar
+            if side == buy and lows[i] <= stop:
+                balance += close_position(times[i], min(stop, opens[i]), 'stop')
+                side = 0
+            elif side == sell and highs[i] >= stop:
+                balance += close_position(times[i], max(stop, opens[i]), 'stop')
+                side = 0
+
+            # risk_free(): tighten the stop to break-even once in profit
+            if side:
+                risk_free = strategy.risk_free_stop(side, entry_price, price)
+                if risk_free is not None:
+                    stop = max(stop, risk_free) if side == buy else min(stop, risk_free)
+
+            # Signal on the bar that just closed; NaN warm-up values never signal.
+            # MACD crosses are rare, so the other default rules are only evaluated on a cross.
+            if signal_at is not None:
+                signal = signal_at(i, price)
+            else:
+                macd_sig = macd_signal(hist[i], hist[i - 1])
+                signal = combine_signals(macd_sig, sar_signal(price, sar[i]),
+                                         adx_signal(adx[i], adx_level)) if macd_sig else 0
+            if signal and signal != side:
+                if side:
+                    balance += close_position(times[i], price, 'reverse')
+                size = strategy.order_amount(balance, price, leverage, digits)
+                if size > 0:
+                    side, entry_price, entry_time, amount = signal, price, times[i], size
+                    stop = strategy.stop_loss_price(side, price, stoploss)
+                    balance -= fee * price * amount
+                else:
+                    side = 0
+
+            if side == buy:
+                equity[i] = balance + (price - entry_price) * amount
+            elif side == sell:
+                equity[i] = balance + (entry_price - price) * amount
+            else:
+                equity[i] = balance
+
+        if side and closes:
+            balance += close_position(times[-1], closes[-1], 'end')
+            equity[-1] = balance
+
+        return BacktestResult(trades, self.candles['time'], np.array(equity), self.initial_balance)
+
+
+if __name__ == "__main__":
+    from candle_store import CandleStore
+
+    parser = argparse.ArgumentParser(description='Backtest the default strategy on stored candles.')
+    parser.add_argument('market', help='e.g. ETHUSDT')
+    parser.add_argument('--kline-type', default='5min')
+    parser.add_argument('--root', default='candles', help='CandleStore directory')
+    parser.add_argument('--values', nargs=7, type=float, default=strategy.DEFAULT_INDICATOR_VALUES,
+                        metavar=('FAST', 'SLOW', 'SIGNAL', 'ACC', 'MAX', 'ADX_PERIOD', 'ADX_LEVEL'))
+    parser.add_argument('--leverage', type=float, default=3)
+    parser.add_argument('--stoploss', type=float, default=5)
+    parser.add_argument('--balance', type=float, default=1000.0)
+    parser.add_argument('--fee', type=float, default=0.0)
+    parser.add_argument('--digits', type=int, default=2)
+    parser.add_argument('--trades', action='store_true', help='print the trade log')
+    args = parser.parse_args()
+
+    candles = CandleStore(root=args.root).load(args.market, args.kline_type)
+    started = time.perf_counter()
+    result = Backtester(candles, args.balance, args.fee, args.digits).run(args.values, args.leverage, args.stoploss)
+    elapsed = time.perf_counter() - started
+
+    if args.trades:
+        for trade in result.trades:
+            print(trade)
+    print(result.summary())
+    print('{0} candles in {1:.3f}s'.format(len(candles['time']), elapsed))
@@ -0,0 +1,220 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Local on-disk store of Coinex kline history.
+
+Candles are kept per (market, kline_type) as one raw binary file per column
+(`time` as int64, prices and volumes as float64) under
+`<root>/<market>/<kline_type>/`. Files are append-only in the common case and
+are read back as memory-mapped NumPy arrays, so serving a time range never
+copies the whole history nor touches the network.
+
+Only closed candles are stored. `store()` appends the bars newer than the
+last stored one and uses the same rows to fill any gaps they cover; MarketTrader
+calls it with the klines it fetches every cycle, and `sync()` fetches them
+itself. Gaps older than the 1000-bar window of `CoinexPerpetualApi.kline` are
+reported by `gaps()`. `merge()` rewrites a whole series in a sibling directory
+and swaps it in, so readers never see columns from two different versions.
+"""
+
+import logging
+import os
+import shutil
+
+import numpy as np
+
+from indicators import KLINE_COLUMNS
+
+# Seconds per Coinex kline type
+KLINE_SECONDS = {
+    '1min': 60,
+    '3min': 180,
+    '5min': 300,
+    '15min': 900,
+    '30min': 1800,
+    '1hour': 3600,
+    '2hour': 7200,
+    '4hour': 14400,
+    '6hour': 21600,
+    '12hour': 43200,
+    '1day': 86400,
+    '3day': 259200,
+    '1week': 604800
+}
+
+COLUMN_DTYPES = {name: np.int64 if name == 'time' else np.float64 for name in KLINE_COLUMNS}
+
+# Suffixes of the directories merge() swaps through
+MERGE_SUFFIX = '.merge'
+OLD_SUFFIX = '.old'
+
+
+class CandleStore(object):
+
+    def __init__(self, api=None, root='candles', logger=None):
+        self.api = api
+        self.root = root
+        self.logger = logger or logging
+
+    def _dir(self, market, kline_type):
+        return os.path.join(self.root, market.upper(), kline_type)
+
+    def _column_path(self, market, kline_type, column, directory=None):
+        return os.path.join(directory or self._dir(market, kline_type), column + '.bin')
+
+    def _recover(self, market, kline_type):
+        """Put back the previous series if a merge was interrupted between its two renames."""
+        directory = self._dir(market, kline_type)
+        if not os.path.isdir(directory) and os.path.isdir(directory + OLD_SUFFIX):
+            os.rename(directory + OLD_SUFFIX, directory)
+
+    def keys(self):
+        """Yield the (market, kline_type) pairs present on disk."""
+        if not os.path.isdir(self.root):
+            return
+        for market in sorted(os.listdir(self.root)):
+            market_dir = os.path.join(self.root, market)
+            if os.path.isdir(market_dir):
+                for kline_type in sorted(os.listdir(market_dir)):
+                    if not kline_type.endswith((MERGE_SUFFIX, OLD_SUFFIX)):
+                        yield market, kline_type
+
+    # ==============================================
+    # READING
+    # ==============================================
+
+    def _length(self, market, kline_type) -> int:
+        """Number of complete candles; an interrupted write can leave columns of different length."""
+        sizes = []
+        for column in KLINE_COLUMNS:
+            path = self._column_path(market, kline_type, column)
+            itemsize = np.dtype(COLUMN_DTYPES[column]).itemsize
+            sizes.append(os.path.getsize(path) // itemsize if os.path.exists(path) else 0)
+        return min(sizes)
+
+    def load(self, market, kline_type) -> dict:
+        """Return all stored candles as read-only memory-mapped column arrays."""
+        self._recover(market, kline_type)
+        # Trust the shortest column
+        length = self._length(market, kline_type)
+        candles = {}
+        for column in KLINE_COLUMNS:
+            if length == 0:
+                candles[column] = np.empty(0, dtype=COLUMN_DTYPES[column])
+            else:
+                candles[column] = np.memmap(self._column_path(market, kline_type, column),
+                                            dtype=COLUMN_DTYPES[column], mode='r', shape=(length,))
+        return candles
+
+    def range(self, market, kline_type, start=None, end=None) -> dict:
+        """Return candles with start <= time < end (either bound may be None)."""
+        candles = self.load(market, kline_type)
+        times = candles['time']
+        lo = 0 if start is None else int(np.searchsorted(times, start, side='left'))
+        hi = times.size if end is None else int(np.searchsorted(times, end, side='left'))
+        return {column: values[lo:hi] for column, values in candles.items()}
+
+    def last_time(self, market, kline_type):
+        """Open time of the newest stored candle, or None if nothing is stored."""
+        times = self.load(market, kline_type)['time']
+        return int(times[-1]) if times.size else None
+
+    def gaps(self, market, kline_type) -> list:
+        """Return [(first_missing_time, last_missing_time), ...] for holes in the stored history."""
+        step = KLINE_SECONDS[kline_type]
+        times = self.load(market, kline_type)['time']
+        if times.size < 2:
+            return []
+        holes = np.flatnonzero(np.diff(times) > step)
+        return [(int(times[i]) + step, int(times[i + 1]) - step) for i in holes]
+
+    # ==============================================
+    # WRITING
+    # ==============================================
+
+    @staticmethod
+    def _to_columns(rows) -> dict:
+        rows = [row[:len(KLINE_COLUMNS)] for row in rows]
+        table = np.array(rows, dtype=np.float64).reshape(len(rows), len(KLINE_COLUMNS))
+        return {column: table[:, i].astype(COLUMN_DTYPES[column]) for i, column in enumerate(KLINE_COLUMNS)}
+
+    def append(self, market, kline_type, rows) -> int:
+        """Append closed kline rows newer than the last stored candle; returns how many were written."""
+        if not rows:
+            return 0
+        last = self.last_time(market, kline_type)
+        columns = self._to_columns(rows)
+        keep = np.ones(columns['time'].size, dtype=bool) if last is None else columns['time'] > last
+        if not keep.any():
+            return 0
+        order = np.argsort(columns['time'][keep], kind='stable')
+        os.makedirs(self._dir(market, kline_type), exist_ok=True)
+        self._truncate(market, kline_type)
+        # Write time last so a partial append is cut off by load()
+        for column in KLINE_COLUMNS[1:] + KLINE_COLUMNS[:1]:
+            with open(self._column_path(market, kline_type, column), 'ab') as f:
+                f.write(np.ascontiguousarray(columns[column][keep][order]).tobytes())
+        return int(keep.sum())
+
+    def _truncate(self, market, kline_type):
+        """Cut every column back to the complete candles, dropping what an interrupted append left."""
+        length = self._length(market, kline_type)
+        for column in KLINE_COLUMNS:
+            path = self._column_path(market, kline_type, column)
+            size = length * np.dtype(COLUMN_DTYPES[column]).itemsize
+            if os.path.exists(path) and os.path.getsize(path) != size:
+                os.truncate(path, size)
+
+    def merge(self, market, kline_type, rows) -> int:
+        """Insert rows anywhere in the history (e.g. to fill gaps); existing candles are kept."""
+        if not rows:
+            return 0
+        stored = self.load(market, kline_type)
+        incoming = self._to_columns(rows)
+        new = ~np.isin(incoming['time'], stored['time'])
+        if not new.any():
+            return 0
+        merged = {column: np.concatenate([np.asarray(stored[column]), incoming[column][new]])
+                  for column in KLINE_COLUMNS}
+        _, index = np.unique(merged['time'], return_index=True)
+        del stored
+
+        # Write the merged series next to the current one, then swap the directories
+        directory = self._dir(market, kline_type)
+        staging, old = directory + MERGE_SUFFIX, directory + OLD_SUFFIX
+        shutil.rmtree(staging, ignore_errors=True)
+        shutil.rmtree(old, ignore_errors=True)
+        os.makedirs(staging)
+        for column in KLINE_COLUMNS:
+            with open(self._column_path(market, kline_type, column, staging), 'wb') as f:
+                f.write(np.ascontiguousarray(merged[column][index]).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+        if os.path.isdir(directory):
+            os.rename(directory, old)
+        os.rename(staging, directory)
+        shutil.rmtree(old, ignore_errors=True)
+        return int(new.sum())
+
+    def store(self, market, kline_type, rows) -> int:
+        """Save closed kline rows: fill the gaps they cover and append the candles newer than the history."""
+        if not rows:
+            return 0
+        written = 0
+        first_fetched = int(rows[0][0])
+        last = self.last_time(market, kline_type)
+        if last is not None and first_fetched > last + KLINE_SECONDS[kline_type]:
+            self.logger.warning('{0} {1}: candles between {2} and {3} are older than the kline window'.format(
+                market, kline_type, last, first_fetched))
+        if any(end >= first_fetched for _, end in self.gaps(market, kline_type)):
+            written += self.merge(market, kline_type, rows)
+        written += self.append(market, kline_type, rows)
+        return written
+
+    def sync(self, market, kline_type, limit=1000) -> int:
+        """Fetch recent klines, fill gaps they cover and append new closed candles."""
+        response = self.api.kline(market, kline_type, limit)
+        if not response or response.get('code') != 0:
+            self.logger.error('kline {0} {1} failed: {2}'.format(market, kline_type, response))
+            return 0
+        return self.store(market, kline_type, response['data'][:-1])  # The last kline is the candle still open
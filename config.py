@@ -0,0 +1,213 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Bot configuration from a file and the environment.
+
+Settings start from the defaults in Main.py (its upper-case constants) and
+are overridden by a TOML, YAML or JSON file (chosen by extension; keys are
+the constant names in lower case) and then by environment variables named
+COINEX_BOT_<CONSTANT>. Environment values are parsed as JSON when they can
+be, so COINEX_BOT_RISK_INTERVAL=2.5 is a number; COINEX_BOT_MARKETS may also
+be a plain comma separated list of symbols.
+
+Markets and strategies are declarative:
+
+    [[markets]]
+    symbol = "ETH/USDT"
+    timeframe = "5m"
+    leverage = 3
+
+    [[strategies]]
+    name = "trend"
+    rules = [{rule = "MACDCross", params = [14, 21, 15]}, {rule = "ADXAbove", params = [24, 20.1]}]
+
+ConfigWatcher reloads the file when it changes, so strategy parameters can
+be tuned without restarting the process.
+"""
+
+import json
+import logging
+import os
+import threading
+
+try:
+    import tomllib  # Python 3.11+
+except ImportError:
+    try:
+        import tomli as tomllib  # Optional: pip install tomli
+    except ImportError:
+        tomllib = None
+
+try:
+    import yaml  # Optional: pip install pyyaml
+except ImportError:
+    yaml = None
+
+import signals
+import strategy
+from trader import KLINE_TYPES
+
+ENV_PREFIX = 'COINEX_BOT_'
+
+# Settings of a market left out of its [[markets]] entry
+MARKET_DEFAULTS = {
+    'timeframe': '5m',
+    'leverage': 3,
+    'stoploss': 5,
+    'indicator_values': strategy.DEFAULT_INDICATOR_VALUES
+}
+
+
+class ConfigError(ValueError):
+    pass
+
+
+def read_file(path) -> dict:
+    """Parse a .toml, .yaml/.yml or .json config file."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.toml':
+        if tomllib is None:
+            raise ConfigError('Reading {0} needs Python 3.11+ or tomli'.format(path))
+        with open(path, 'rb') as f:
+            return tomllib.load(f)
+    if extension in ('.yaml', '.yml'):
+        if yaml is None:
+            raise ConfigError('Reading {0} needs pyyaml'.format(path))
+        with open(path) as f:
+            try:
+                return yaml.safe_load(f) or {}
+            except yaml.YAMLError as e:
+                raise ConfigError('{0}: {1}'.format(path, e))
+    if extension == '.json':
+        with open(path) as f:
+            return json.load(f)
+    raise ConfigError('Unsupported config file type: {0}'.format(path))
+
+
+def parse_env(value: str):
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+def load_config(defaults: dict, path=None, environ=None) -> dict:
+    """
+    # params:
+        defaults   upper-case settings, e.g. the constants of Main.py
+        path       optional config file; a missing file is an error
+        environ    environment to read COINEX_BOT_* overrides from (default os.environ)
+    """
+    settings = dict(defaults)
+    if path:
+        for key, value in read_file(path).items():
+            if key.upper() not in settings:
+                raise ConfigError('Unknown setting {0!r} in {1}'.format(key, path))
+            settings[key.upper()] = value
+    environ = os.environ if environ is None else environ
+    for name, value in environ.items():
+        if name.startswith(ENV_PREFIX) and name[len(ENV_PREFIX):] in settings:
+            settings[name[len(ENV_PREFIX):]] = parse_env(value)
+    settings['MARKETS'] = markets(settings.get('MARKETS'))
+    settings['STRATEGIES'] = strategies(settings.get('STRATEGIES'))
+    return settings
+
+
+def markets(entries) -> list:
+    """Market configs with every field filled in."""
+    if isinstance(entries, str):
+        entries = [symbol for symbol in entries.split(',') if symbol.strip()]
+    configs = []
+    for entry in entries or []:
+        if isinstance(entry, str):
+            entry = {'symbol': entry}
+        if 'symbol' not in entry:
+            raise ConfigError('Market without symbol: {0!r}'.format(entry))
+        config = dict(MARKET_DEFAULTS, **entry)
+        config['symbol'] = config['symbol'].strip().upper()
+        if config['timeframe'] not in KLINE_TYPES:
+            raise ConfigError('{0}: unknown timeframe {1!r}, use one of {2}'.format(
+                config['symbol'], config['timeframe'], ', '.join(KLINE_TYPES)))
+        config['indicator_values'] = list(config['indicator_values'])
+        if len(config['indicator_values']) != len(strategy.DEFAULT_INDICATOR_VALUES):
+            raise ConfigError('{0}: indicator_values needs {1} numbers'.format(
+                config['symbol'], len(strategy.DEFAULT_INDICATOR_VALUES)))
+        configs.append(config)
+    return configs
+
+
+def strategies(entries) -> list:
+    """signals.Strategy objects from [{name, rules: [{rule, params}]}]; strategies given as objects pass through."""
+    if not entries:
+        return None
+    built = []
+    for entry in entries:
+        if isinstance(entry, signals.Strategy):
+            built.append(entry)
+            continue
+        rules = []
+        for rule in entry.get('rules', []):
+            cls = getattr(signals, rule.get('rule', ''), None)
+            if not (isinstance(cls, type) and issubclass(cls, signals.Rule)):
+                raise ConfigError('Unknown rule {0!r} in strategy {1!r}'.format(rule.get('rule'), entry.get('name')))
+            try:
+                rules.append(cls(*rule.get('params', [])))
+            except (TypeError, ValueError) as e:
+                raise ConfigError('Invalid params {0!r} for {1} in strategy {2!r}: {3}'.format(
+                    rule.get('params'), rule.get('rule'), entry.get('name'), e))
+        if not rules:
+            raise ConfigError('Strategy {0!r} has no rules'.format(entry.get('name')))
+        try:
+            built.append(signals.Strategy(entry.get('name', 'strategy'), signals.All(*rules)))
+        except ValueError as e:
+            raise ConfigError(str(e))
+    return built
+
+
+class ConfigWatcher(object):
+    """Polls a config file and calls `callback(settings)` with the reloaded settings after each change."""
+
+    def __init__(self, path, defaults, callback, interval=2.0, logger=None):
+        self.path = path
+        self.defaults = defaults
+        self.callback = callback
+        self.interval = interval
+        self.logger = logger or logging
+        self._mtime = self._modified()
+        self._stop = threading.Event()
+
+    def _modified(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def check(self) -> bool:
+        """Reload if the file changed since the last check; invalid files are logged and skipped."""
+        mtime = self._modified()
+        if mtime is None or mtime == self._mtime:
+            return False
+        self._mtime = mtime
+        try:
+            settings = load_config(self.defaults, self.path)
+        except (OSError, ValueError, TypeError) as e:
+            self.logger.error('Ignoring invalid config {0}: {1}'.format(self.path, e))
+            return False
+        self.callback(settings)
+        return True
+
+    def run_forever(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception:
+                self.logger.exception('Config reload failed')
+
+    def start(self):
+        """Watch in a daemon thread."""
+        thread = threading.Thread(target=self.run_forever, name='config-watcher', daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self._stop.set()
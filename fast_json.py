@@ -0,0 +1,38 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+JSON backend for the hot path: orjson if installed, else ujson, else the
+standard library. `loads` accepts str or bytes, so response bodies can be
+parsed straight from the raw bytes; `dumps` always returns str.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+if orjson is not None:
+    BACKEND = 'orjson'
+    loads = orjson.loads
+
+    def dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+elif ujson is not None:
+    BACKEND = 'ujson'
+    loads = ujson.loads
+
+    def dumps(obj) -> str:
+        return ujson.dumps(obj, ensure_ascii=False)
+else:
+    BACKEND = 'json'
+    loads = json.loads
+
+    def dumps(obj) -> str:
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False)
@@ -0,0 +1,134 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+HTTP connection pooling for the Coinex clients.
+
+`PooledAdapter` is a requests HTTPAdapter that turns on TCP keep-alive for
+every socket and records in a `PoolStats` how many requests went out, how
+many of them needed a new connection and how long the TCP connect and TLS
+handshake of those took. `make_session()` builds either a requests.Session
+with that adapter or, when asked for HTTP/2 and httpx is installed, an
+httpx.Client (httpx exposes no per-connection hooks, so only requests are
+counted there).
+"""
+
+import socket
+import threading
+import time
+
+import requests
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPSConnectionPool
+
+try:
+    import httpx  # Optional, for HTTP/2: pip install httpx[http2]
+except ImportError:
+    httpx = None
+
+
+class PoolStats(object):
+    """Thread-safe connection pool counters."""
+
+    def __init__(self):
+        self.requests = 0
+        self.new_connections = 0
+        self.connect_time = 0.0
+        self.tls_handshakes = 0
+        self.tls_time = 0.0
+        self._lock = threading.Lock()
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def record_connection(self, connect_time, tls_time=None):
+        """A new connection took `connect_time` seconds in total, `tls_time` of it for the TLS handshake."""
+        with self._lock:
+            self.new_connections += 1
+            self.connect_time += connect_time
+            if tls_time is not None:
+                self.tls_handshakes += 1
+                self.tls_time += tls_time
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            reused = max(0, self.requests - self.new_connections)
+            return {
+                'requests': self.requests,
+                'new_connections': self.new_connections,
+                'reused': reused,
+                'hit_rate': reused / self.requests if self.requests else None,
+                'avg_connect_ms': 1000 * self.connect_time / self.new_connections if self.new_connections else None,
+                'avg_tls_handshake_ms': 1000 * self.tls_time / self.tls_handshakes if self.tls_handshakes else None
+            }
+
+
+def keepalive_options(idle=60, interval=15, count=4) -> list:
+    """urllib3 socket options enabling TCP keep-alive probes (where the platform supports them)."""
+    options = [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    for name, value in (('TCP_KEEPIDLE', idle), ('TCP_KEEPINTVL', interval), ('TCP_KEEPCNT', count)):
+        if hasattr(socket, name):
+            options.append((socket.IPPROTO_TCP, getattr(socket, name), value))
+    return HTTPConnection.default_socket_options + options
+
+
+class PooledAdapter(requests.adapters.HTTPAdapter):
+    """HTTPAdapter with TCP keep-alive on every socket and connection statistics."""
+
+    def __init__(self, stats, socket_options=None, **kwargs):
+        # Set before HTTPAdapter.__init__, which calls init_poolmanager
+        self.stats = stats
+        self.socket_options = socket_options
+        super(PooledAdapter, self).__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        if self.socket_options:
+            pool_kwargs['socket_options'] = self.socket_options
+        super(PooledAdapter, self).init_poolmanager(connections, maxsize, block, **pool_kwargs)
+        stats = self.stats
+
+        class TimedConnection(HTTPSConnection):
+            def _new_conn(self):
+                started = time.perf_counter()
+                sock = super(TimedConnection, self)._new_conn()
+                self.tcp_time = time.perf_counter() - started
+                return sock
+
+            def connect(self):
+                started = time.perf_counter()
+                super(TimedConnection, self).connect()
+                connect_time = time.perf_counter() - started
+                stats.record_connection(connect_time, connect_time - getattr(self, 'tcp_time', 0.0))
+
+        class TimedPool(HTTPSConnectionPool):
+            ConnectionCls = TimedConnection
+
+        self.poolmanager.pool_classes_by_scheme = dict(self.poolmanager.pool_classes_by_scheme, https=TimedPool)
+
+    def send(self, request, **kwargs):
+        self.stats.record_request()
+        return super(PooledAdapter, self).send(request, **kwargs)
+
+
+def make_session(stats, pool_size=10, pool_connections=1, pool_block=False, keepalive=True, http2=False,
+                 logger=None):
+    """
+    # params:
+        pool_size          connections kept open per host (max concurrent requests to api.coinex.com)
+        pool_connections   number of hosts to keep pools for
+        pool_block         wait for a free connection instead of opening a throw-away one
+        keepalive          TCP keep-alive probes so idle pooled connections are not silently dropped
+        http2              use httpx with HTTP/2 if installed, else fall back to requests
+    """
+    if http2:
+        if httpx is not None:
+            limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+            return httpx.Client(http2=True, limits=limits,
+                                event_hooks={'request': [lambda request: stats.record_request()]})
+        if logger:
+            logger.warning('HTTP/2 requested but httpx is not installed; using HTTP/1.1')
+    session = requests.Session()
+    adapter = PooledAdapter(stats, socket_options=keepalive_options() if keepalive else None,
+                            pool_connections=pool_connections, pool_maxsize=pool_size, pool_block=pool_block)
+    session.mount('https://', adapter)
+    return session
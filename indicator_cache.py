@@ -0,0 +1,99 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Indicator results cached for the life of a candle.
+
+An indicator computed on closed candles cannot change until the next candle
+closes, so results are keyed by what they were computed from (indicator,
+parameters, symbol, interval and the open time of the running candle) and
+expire exactly at that candle's close. The cache is a bounded LRU shared by
+every market; hits, misses, evictions and expirations are counted.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from scheduler import next_close
+from candle_store import KLINE_SECONDS
+
+
+def candle_window(kline_type, now=None) -> tuple:
+    """(open time, close time) of the `kline_type` candle running at `now`."""
+    close = next_close(kline_type, now)
+    return close - KLINE_SECONDS[kline_type], close
+
+
+def params_key(params) -> tuple:
+    """Hashable, order-independent form of a parameters dict."""
+    return tuple(sorted((key, str(value)) for key, value in (params or {}).items()))
+
+
+class IndicatorCache(object):
+
+    def __init__(self, max_size=256):
+        """
+        # params:
+            max_size   entries kept; the least recently used one is dropped beyond that
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, source, indicator, params, symbol, kline_type, now=None) -> tuple:
+        """Cache key and expiry time of an indicator computed on the candles closed before `now`."""
+        opened, closes = candle_window(kline_type, now)
+        return (source, indicator, params_key(params), symbol, kline_type, opened), closes
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= time.time():
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, expires):
+        """Keep `value` until the Unix time `expires`."""
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key, expires, compute):
+        """Cached value of `key`, else `compute()` stored until `expires` (None results are not cached)."""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            if value is not None:
+                self.put(key, value, expires)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else None,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
@@ -0,0 +1,375 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Streaming (incremental) indicator state.
+
+Each indicator consumes one closed candle at a time in O(1) and exposes its
+current `value` and `previous` value. The recursions are the same as the
+vectorized functions in `indicators`, so feeding a history candle by candle
+reproduces their last two entries.
+
+State can be checkpointed with `to_dict()`/`IndicatorSet.save()` and restored
+with `from_dict()`/`IndicatorSet.load()` so a restart does not need a full
+warm-up.
+"""
+
+import json
+import os
+
+
+class IndicatorState(object):
+    """Base class: keeps the current and previous output and handles (de)serialization."""
+
+    def __init__(self):
+        self.value = None
+        self.previous = None
+
+    @property
+    def ready(self) -> bool:
+        return self.value is not None
+
+    def _push(self, value):
+        self.previous = self.value
+        self.value = value
+
+    def to_dict(self) -> dict:
+        state = {}
+        for key, item in vars(self).items():
+            state[key] = item.to_dict() if isinstance(item, IndicatorState) else item
+        return {'type': type(self).__name__, 'state': state}
+
+    @staticmethod
+    def from_dict(data: dict) -> 'IndicatorState':
+        cls = _registry()[data['type']]
+        obj = cls.__new__(cls)
+        for key, item in data['state'].items():
+            if isinstance(item, dict) and 'type' in item and 'state' in item:
+                item = IndicatorState.from_dict(item)
+            setattr(obj, key, item)
+        return obj
+
+
+def _registry() -> dict:
+    classes, pending = {}, [IndicatorState]
+    while pending:
+        cls = pending.pop()
+        classes[cls.__name__] = cls
+        pending.extend(cls.__subclasses__())
+    return classes
+
+
+# ==============================================
+# SMOOTHING PRIMITIVES
+# ==============================================
+
+class EMA(IndicatorState):
+    """Exponential moving average seeded with the SMA of the first `period` values."""
+
+    def __init__(self, period: int):
+        super(EMA, self).__init__()
+        self.period = int(period)
+        self._seed_sum = 0.0
+        self._seed_count = 0
+
+    def update(self, value: float):
+        if value is None or value != value:
+            return self.value
+        if self._seed_count < self.period:
+            self._seed_sum += value
+            self._seed_count += 1
+            if self._seed_count == self.period:
+                self._push(self._seed_sum / self.period)
+            return self.value
+        self._push(self.value + 2.0 / (self.period + 1) * (value - self.value))
+        return self.value
+
+
+class Wilder(IndicatorState):
+    """Wilder's smoothing (RMA) seeded with the mean of the first `period` values."""
+
+    def __init__(self, period: int):
+        super(Wilder, self).__init__()
+        self.period = int(period)
+        self._seed_sum = 0.0
+        self._seed_count = 0
+
+    def update(self, value: float):
+        if value is None or value != value:
+            return self.value
+        if self._seed_count < self.period:
+            self._seed_sum += value
+            self._seed_count += 1
+            if self._seed_count == self.period:
+                self._push(self._seed_sum / self.period)
+            return self.value
+        self._push((self.value * (self.period - 1) + value) / self.period)
+        return self.value
+
+
+# ==============================================
+# CANDLE INDICATORS
+# ==============================================
+# All candle indicators share the update(high, low, close) signature.
+
+class MACDState(IndicatorState):
+    """MACD; `value`/`previous` hold the histogram, `line`/`signal_line` the other outputs."""
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        super(MACDState, self).__init__()
+        self.fast = EMA(fast)
+        self.slow = EMA(slow)
+        self.signal = EMA(signal)
+        self.line = None
+        self.signal_line = None
+
+    def update(self, high: float, low: float, close: float):
+        fast = self.fast.update(close)
+        slow = self.slow.update(close)
+        if fast is None or slow is None:
+            return self.value
+        self.line = fast - slow
+        self.signal_line = self.signal.update(self.line)
+        if self.signal_line is not None:
+            self._push(self.line - self.signal_line)
+        return self.value
+
+
+class RSIState(IndicatorState):
+    """Relative strength index with Wilder smoothing."""
+
+    def __init__(self, period: int = 14):
+        super(RSIState, self).__init__()
+        self.gain = Wilder(period)
+        self.loss = Wilder(period)
+        self._prev_close = None
+
+    def update(self, high: float, low: float, close: float):
+        if self._prev_close is not None:
+            change = close - self._prev_close
+            avg_gain = self.gain.update(max(change, 0.0))
+            avg_loss = self.loss.update(max(-change, 0.0))
+            if avg_loss is not None:
+                self._push(100.0 if avg_loss == 0 else 100.0 - 100.0 / (1.0 + avg_gain / avg_loss))
+        self._prev_close = close
+        return self.value
+
+
+class ADXState(IndicatorState):
+    """Average directional index (TA-Lib style Wilder sums feeding a Wilder-smoothed DX)."""
+
+    def __init__(self, period: int = 14):
+        super(ADXState, self).__init__()
+        self.period = int(period)
+        self.dx = Wilder(period)
+        self._prev = None
+        self._bars = 0
+        self._s_tr = 0.0
+        self._s_plus = 0.0
+        self._s_minus = 0.0
+
+    def update(self, high: float, low: float, close: float):
+        if self._prev is None:
+            self._prev = [high, low, close]
+            return self.value
+        prev_high, prev_low, prev_close = self._prev
+        self._prev = [high, low, close]
+        up_move = high - prev_high
+        down_move = prev_low - low
+        plus_dm = up_move if up_move > down_move and up_move > 0 else 0.0
+        minus_dm = down_move if down_move > up_move and down_move > 0 else 0.0
+        tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        self._bars += 1
+
+        # The first period-1 bars only seed the running sums
+        if self._bars < self.period:
+            self._s_tr += tr
+            self._s_plus += plus_dm
+            self._s_minus += minus_dm
+            return self.value
+        self._s_tr = self._s_tr - self._s_tr / self.period + tr
+        self._s_plus = self._s_plus - self._s_plus / self.period + plus_dm
+        self._s_minus = self._s_minus - self._s_minus / self.period + minus_dm
+        if self._s_tr == 0:
+            dx = 0.0
+        else:
+            plus_di = 100.0 * self._s_plus / self._s_tr
+            minus_di = 100.0 * self._s_minus / self._s_tr
+            total = plus_di + minus_di
+            dx = 0.0 if total == 0 else 100.0 * abs(plus_di - minus_di) / total
+        adx = self.dx.update(dx)
+        if adx is not None:
+            self._push(adx)
+        return self.value
+
+
+class SARState(IndicatorState):
+    """Parabolic SAR keeping the acceleration factor, extreme point and trend side."""
+
+    def __init__(self, acceleration: float = 0.02, maximum: float = 0.2):
+        super(SARState, self).__init__()
+        self.acceleration = float(acceleration)
+        self.maximum = float(maximum)
+        self.is_long = None
+        self._first = None
+        self._af = self.acceleration
+        self._ep = None
+        self._sar = None
+        self._prev_high = None
+        self._prev_low = None
+
+    def update(self, high: float, low: float, close: float):
+        if self._first is None:
+            self._first = [high, low]
+            return self.value
+        if self.is_long is None:
+            # Seed the direction from the first two bars
+            first_high, first_low = self._first
+            down_move = first_low - low
+            up_move = high - first_high
+            self.is_long = not (down_move > 0 and down_move > up_move)
+            if self.is_long:
+                self._ep, self._sar = high, first_low
+            else:
+                self._ep, self._sar = low, first_high
+            self._prev_high, self._prev_low = first_high, first_low
+
+        af, ep, sar = self._af, self._ep, self._sar
+        prev_high, prev_low = self._prev_high, self._prev_low
+        if self.is_long:
+            if low <= sar:
+                self.is_long = False
+                sar = max(ep, prev_high, high)
+                output = sar
+                af = self.acceleration
+                ep = low
+                sar = max(sar + af * (ep - sar), prev_high, high)
+            else:
+                output = sar
+                if high > ep:
+                    ep = high
+                    af = min(af + self.acceleration, self.maximum)
+                sar = min(sar + af * (ep - sar), prev_low, low)
+        else:
+            if high >= sar:
+                self.is_long = True
+                sar = min(ep, prev_low, low)
+                output = sar
+                af = self.acceleration
+                ep = high
+                sar = min(sar + af * (ep - sar), prev_low, low)
+            else:
+                output = sar
+                if low < ep:
+                    ep = low
+                    af = min(af + self.acceleration, self.maximum)
+                sar = max(sar + af * (ep - sar), prev_high, high)
+        self._af, self._ep, self._sar = af, ep, sar
+        self._prev_high, self._prev_low = high, low
+        self._push(output)
+        return self.value
+
+
+class SupertrendState(IndicatorState):
+    """Supertrend line; `direction`/`previous_direction` are 1 for long and -1 for short."""
+
+    def __init__(self, period: int = 10, multiplier: float = 3.0):
+        super(SupertrendState, self).__init__()
+        self.multiplier = float(multiplier)
+        self.atr = Wilder(period)
+        self.direction = None
+        self.previous_direction = None
+        self._prev_close = None
+        self._upper = None
+        self._lower = None
+
+    def update(self, high: float, low: float, close: float):
+        prev_close = self._prev_close
+        self._prev_close = close
+        if prev_close is None:
+            return self.value
+        tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        band_atr = self.atr.update(tr)
+        if band_atr is None:
+            return self.value
+        mid = (high + low) / 2.0
+        upper = mid + self.multiplier * band_atr
+        lower = mid - self.multiplier * band_atr
+        if self.direction is None:
+            self._upper, self._lower = upper, lower
+            trend = 1 if close > upper else -1
+        else:
+            if upper < self._upper or prev_close > self._upper:
+                self._upper = upper
+            if lower > self._lower or prev_close < self._lower:
+                self._lower = lower
+            trend = self.direction
+            if trend == -1 and close > self._upper:
+                trend = 1
+            elif trend == 1 and close < self._lower:
+                trend = -1
+        self.previous_direction, self.direction = self.direction, trend
+        self._push(self._lower if trend == 1 else self._upper)
+        return self.value
+
+
+# ==============================================
+# INDICATOR SET
+# ==============================================
+
+class IndicatorSet(object):
+    """Named candle indicators fed together, with the time of the last applied candle."""
+
+    def __init__(self, indicators: dict = None, meta: dict = None):
+        self.indicators = dict(indicators or {})
+        self.meta = dict(meta or {})
+        self.last_time = None
+        self.last_close = None
+
+    def __getitem__(self, name: str) -> IndicatorState:
+        return self.indicators[name]
+
+    def update(self, timestamp: int, high: float, low: float, close: float) -> bool:
+        """Apply one closed candle; candles at or before `last_time` are ignored."""
+        if self.last_time is not None and timestamp <= self.last_time:
+            return False
+        for indicator in self.indicators.values():
+            indicator.update(high, low, close)
+        self.last_time = timestamp
+        self.last_close = close
+        return True
+
+    def update_from_kline(self, rows) -> int:
+        """Apply closed kline rows ([time, open, close, high, low, ...]); returns how many were new."""
+        applied = 0
+        for row in rows:
+            if self.update(int(row[0]), float(row[3]), float(row[4]), float(row[2])):
+                applied += 1
+        return applied
+
+    def to_dict(self) -> dict:
+        return {
+            'meta': self.meta,
+            'last_time': self.last_time,
+            'last_close': self.last_close,
+            'indicators': {name: item.to_dict() for name, item in self.indicators.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'IndicatorSet':
+        obj = cls({name: IndicatorState.from_dict(item) for name, item in data['indicators'].items()},
+                  data.get('meta'))
+        obj.last_time = data.get('last_time')
+        obj.last_close = data.get('last_close')
+        return obj
+
+    def save(self, path: str):
+        """Atomically write a JSON checkpoint."""
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'IndicatorSet':
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
@@ -0,0 +1,239 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Local technical indicators computed with NumPy over Coinex kline data.
+
+The formulas follow the TA-Lib conventions used by taapi.io (SMA-seeded EMAs,
+Wilder smoothing for RSI/ATR/ADX), so the values line up with what the bot
+used to fetch remotely once enough history has been supplied.
+
+Every function returns arrays aligned with its input; the leading warm-up
+entries are NaN. Use `backtracks()` to read results the way taapi returns
+them: index 0 is the current (still open) candle, 1 the last closed one, etc.
+"""
+
+import numpy as np
+
+# Column order of a row returned by CoinexPerpetualApi.kline
+KLINE_COLUMNS = ('time', 'open', 'close', 'high', 'low', 'volume', 'amount')
+
+
+def candles_from_kline(rows) -> dict:
+    """Convert the 'data' list of a kline response into a dict of column arrays."""
+    table = np.array([row[:len(KLINE_COLUMNS)] for row in rows], dtype=np.float64)
+    if table.size == 0:
+        table = table.reshape(0, len(KLINE_COLUMNS))
+    candles = {name: table[:, i] for i, name in enumerate(KLINE_COLUMNS)}
+    candles['time'] = candles['time'].astype(np.int64)
+    return candles
+
+
+def backtracks(values, count: int) -> list:
+    """Return the last `count` values newest first, like taapi's `backtracks`."""
+    return [float(v) for v in values[::-1][:count]]
+
+
+# ==============================================
+# MOVING AVERAGES
+# ==============================================
+
+def ema(values, period: int) -> np.ndarray:
+    """Exponential moving average seeded with the SMA of the first `period` values."""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    valid = np.flatnonzero(~np.isnan(values))
+    if valid.size == 0:
+        return out
+    start = valid[0]
+    if values.size - start < period:
+        return out
+    k = 2.0 / (period + 1)
+    prev = values[start:start + period].mean()
+    out[start + period - 1] = prev
+    series = values[start + period:].tolist()
+    smoothed = []
+    for value in series:
+        prev = prev + k * (value - prev)
+        smoothed.append(prev)
+    out[start + period:] = smoothed
+    return out
+
+
+def wilder(values, period: int, start: int = 0) -> np.ndarray:
+    """Wilder's smoothing (RMA) seeded with the mean of the first `period` values from `start`."""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    if values.size - start < period:
+        return out
+    prev = values[start:start + period].mean()
+    out[start + period - 1] = prev
+    smoothed = []
+    for value in values[start + period:].tolist():
+        prev = (prev * (period - 1) + value) / period
+        smoothed.append(prev)
+    out[start + period:] = smoothed
+    return out
+
+
+def true_range(high, low, close) -> np.ndarray:
+    """True range; the first bar has no previous close and is NaN."""
+    high, low, close = (np.asarray(a, dtype=np.float64) for a in (high, low, close))
+    prev_close = np.roll(close, 1)
+    tr = np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+    if tr.size:
+        tr[0] = np.nan
+    return tr
+
+
+def atr(high, low, close, period: int) -> np.ndarray:
+    """Average true range with Wilder smoothing."""
+    return wilder(true_range(high, low, close), period, start=1)
+
+
+# ==============================================
+# INDICATORS
+# ==============================================
+
+def macd(close, fast: int = 12, slow: int = 26, signal: int = 9):
+    """Return (macd, signal, histogram) arrays."""
+    close = np.asarray(close, dtype=np.float64)
+    fast, slow, signal = int(fast), int(slow), int(signal)
+    macd_line = ema(close, fast) - ema(close, slow)
+    signal_line = ema(macd_line, signal)
+    return macd_line, signal_line, macd_line - signal_line
+
+
+def rsi(close, period: int = 14) -> np.ndarray:
+    """Relative strength index with Wilder smoothing."""
+    close = np.asarray(close, dtype=np.float64)
+    period = int(period)
+    out = np.full(close.shape, np.nan)
+    if close.size <= period:
+        return out
+    change = np.diff(close)
+    avg_gain = wilder(np.clip(change, 0, None), period)
+    avg_loss = wilder(np.clip(-change, 0, None), period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out[1:] = np.where(avg_loss == 0, 100.0, 100.0 - 100.0 / (1.0 + avg_gain / avg_loss))
+    return out
+
+
+def adx(high, low, close, period: int = 14) -> np.ndarray:
+    """Average directional index (TA-Lib style Wilder smoothing)."""
+    high, low, close = (np.asarray(a, dtype=np.float64) for a in (high, low, close))
+    period = int(period)
+    out = np.full(close.shape, np.nan)
+    n = close.size
+    if n < 2 * period:
+        return out
+    up_move = np.diff(high)
+    down_move = -np.diff(low)
+    plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)
+    minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)
+    tr = true_range(high, low, close)[1:]
+
+    # Running Wilder sums: seeded with the first period-1 values, then S = S - S/p + x
+    s_tr = tr[:period - 1].sum()
+    s_plus = plus_dm[:period - 1].sum()
+    s_minus = minus_dm[:period - 1].sum()
+    dx = np.full(n, np.nan)
+    for i, (t, p, m) in enumerate(zip(tr[period - 1:].tolist(),
+                                      plus_dm[period - 1:].tolist(),
+                                      minus_dm[period - 1:].tolist()), start=period):
+        s_tr = s_tr - s_tr / period + t
+        s_plus = s_plus - s_plus / period + p
+        s_minus = s_minus - s_minus / period + m
+        if s_tr == 0:
+            dx[i] = 0.0
+            continue
+        plus_di = 100.0 * s_plus / s_tr
+        minus_di = 100.0 * s_minus / s_tr
+        total = plus_di + minus_di
+        dx[i] = 0.0 if total == 0 else 100.0 * abs(plus_di - minus_di) / total
+    return wilder(dx, period, start=period)
+
+
+def parabolic_sar(high, low, acceleration: float = 0.02, maximum: float = 0.2) -> np.ndarray:
+    """Parabolic SAR (TA-Lib algorithm, direction seeded from the first two bars)."""
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    acceleration, maximum = float(acceleration), float(maximum)
+    out = np.full(high.shape, np.nan)
+    if high.size < 2:
+        return out
+    highs, lows = high.tolist(), low.tolist()
+
+    down_move = lows[0] - lows[1]
+    up_move = highs[1] - highs[0]
+    is_long = not (down_move > 0 and down_move > up_move)
+    af = acceleration
+    if is_long:
+        ep, sar = highs[1], lows[0]
+    else:
+        ep, sar = lows[1], highs[0]
+    prev_high, prev_low = highs[0], lows[0]
+
+    for i in range(1, len(highs)):
+        h, l = highs[i], lows[i]
+        if is_long:
+            if l <= sar:
+                # Reverse to short: the SAR jumps to the extreme point of the long run
+                is_long = False
+                sar = max(ep, prev_high, h)
+                out[i] = sar
+                af = acceleration
+                ep = l
+                sar = max(sar + af * (ep - sar), prev_high, h)
+            else:
+                out[i] = sar
+                if h > ep:
+                    ep = h
+                    af = min(af + acceleration, maximum)
+                sar = min(sar + af * (ep - sar), prev_low, l)
+        else:
+            if h >= sar:
+                is_long = True
+                sar = min(ep, prev_low, l)
+                out[i] = sar
+                af = acceleration
+                ep = h
+                sar = min(sar + af * (ep - sar), prev_low, l)
+            else:
+                out[i] = sar
+                if l < ep:
+                    ep = l
+                    af = min(af + acceleration, maximum)
+                sar = max(sar + af * (ep - sar), prev_high, h)
+        prev_high, prev_low = h, l
+    return out
+
+
+def supertrend(high, low, close, period: int = 10, multiplier: float = 3.0):
+    """Return (supertrend line, direction) where direction is 1 for long and -1 for short."""
+    high, low, close = (np.asarray(a, dtype=np.float64) for a in (high, low, close))
+    period, multiplier = int(period), float(multiplier)
+    line = np.full(close.shape, np.nan)
+    direction = np.zeros(close.shape, dtype=np.int8)
+    band_atr = atr(high, low, close, period)
+    mid = (high + low) / 2.0
+    upper = (mid + multiplier * band_atr).tolist()
+    lower = (mid - multiplier * band_atr).tolist()
+    closes = close.tolist()
+
+    first = period
+    if close.size <= first:
+        return line, direction
+    final_upper, final_lower = upper[first], lower[first]
+    trend = 1 if closes[first] > final_upper else -1
+    line[first] = final_lower if trend == 1 else final_upper
+    direction[first] = trend
+    for i in range(first + 1, len(closes)):
+        final_upper = upper[i] if upper[i] < final_upper or closes[i - 1] > final_upper else final_upper
+        final_lower = lower[i] if lower[i] > final_lower or closes[i - 1] < final_lower else final_lower
+        if trend == -1 and closes[i] > final_upper:
+            trend = 1
+        elif trend == 1 and closes[i] < final_lower:
+            trend = -1
+        line[i] = final_lower if trend == 1 else final_upper
+        direction[i] = trend
+    return line, direction
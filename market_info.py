@@ -0,0 +1,120 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Market metadata cache.
+
+Precisions, contract multipliers, allowed leverages and risk-limit tiers of
+every market (get_market_info and risk_config) are loaded once, kept in a
+dict by market name and persisted to disk, so a restart within `max_age`
+needs no request at all and order sizing never asks the exchange. If the
+exchange cannot be reached, a stale file is still used.
+"""
+
+import logging
+import os
+import threading
+import time
+
+import fast_json
+from models import Market
+
+
+class MarketMetadata(object):
+
+    def __init__(self, robot, path='market_info.json', max_age=86400, logger=None):
+        """
+        # params:
+            robot     api.CoinexPerpetualApi
+            path      file the metadata is persisted to (None keeps it in memory only)
+            max_age   seconds after which the metadata is fetched again
+        """
+        self.robot = robot
+        self.path = path
+        self.max_age = max_age
+        self.logger = logger or logging
+        self.markets = {}
+        self.updated = None
+        self._lock = threading.Lock()
+
+    # ==============================================
+    # LOADING
+    # ==============================================
+
+    def _apply(self, data):
+        risk_limits = data.get('risk_limits') or {}
+        self.markets = {item['name']: Market(item, risk_limits.get(item['name']))
+                        for item in data.get('markets') or []}
+        self.updated = data.get('updated')
+
+    def load(self):
+        """Use the persisted metadata if it is recent enough, else fetch it."""
+        data = None
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path, 'rb') as f:
+                    data = fast_json.loads(f.read())
+            except (OSError, ValueError) as e:
+                self.logger.warning('Ignoring unreadable {0}: {1}'.format(self.path, e))
+        if data is not None:
+            self._apply(data)
+        if self.stale() and not self.refresh() and not self.markets:
+            raise RuntimeError('No market metadata: the exchange is unreachable and {0} is missing'.format(self.path))
+        return self
+
+    def stale(self) -> bool:
+        return self.updated is None or time.time() - self.updated > self.max_age
+
+    def refresh(self) -> bool:
+        """Fetch market info and risk limits; on failure the current metadata is kept."""
+        with self._lock:
+            markets = self.robot.get_market_info()
+            limits = self.robot.risk_config()
+            if not markets or markets.get('code') != 0 or not limits or limits.get('code') != 0:
+                self.logger.error('Error fetching market metadata: {0} {1}'.format(markets, limits))
+                return False
+            data = {'updated': time.time(), 'markets': markets['data'], 'risk_limits': limits['data']}
+            self._apply(data)
+            if self.path:
+                tmp_path = self.path + '.tmp'
+                with open(tmp_path, 'w') as f:
+                    f.write(fast_json.dumps(data))
+                os.replace(tmp_path, self.path)
+            return True
+
+    def refresh_if_stale(self):
+        if self.stale():
+            self.refresh()
+
+    # ==============================================
+    # LOOKUPS
+    # ==============================================
+
+    def __contains__(self, market):
+        return market in self.markets
+
+    def get(self, market) -> Market:
+        return self.markets.get(market)
+
+    def amount_digits(self, market, default=None) -> int:
+        """Decimals of an order amount (amount_prec; stock_prec is the asset's precision, not the order's)."""
+        info = self.markets.get(market)
+        if info is None or info.amount_prec is None:
+            return default
+        return info.amount_prec
+
+    def price_digits(self, market, default=None) -> int:
+        """Decimals of a price (money_prec)."""
+        info = self.markets.get(market)
+        return info.money_prec if info is not None else default
+
+    def max_leverage(self, market, amount=0.0) -> int:
+        """Highest leverage allowed for a position of `amount` by the risk-limit tiers."""
+        info = self.markets.get(market)
+        if info is None:
+            return None
+        for limit, leverage, _ in info.risk_limits:
+            if amount <= limit:
+                return int(leverage)
+        if info.risk_limits:
+            return int(info.risk_limits[-1][1])
+        return max(info.leverages) if info.leverages else None
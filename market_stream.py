@@ -0,0 +1,196 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Streaming market data from Coinex's perpetual WebSocket.
+
+MarketStream subscribes to the `state` (ticker), `depth` and `deals` channels
+for a set of markets and keeps, per market, the latest ticker, an order book
+and a bounded trade tape in memory. It reconnects with exponential backoff and
+resubscribes every channel after each reconnect, so readers just call
+`index_price()` / `ticker()` / `depth()` / `deals()` instead of polling REST.
+
+The server URL is a constructor argument, which lets the stream run against a
+local stand-in server that speaks the same JSON-RPC messages.
+"""
+
+import asyncio
+import itertools
+import logging
+import random
+import threading
+import time
+from collections import deque
+
+import websockets
+
+import fast_json
+from models import Ticker
+from order_book import OrderBook
+
+WS_URL = 'wss://perpetual.coinex.com/'
+
+
+class MarketStream(object):
+
+    def __init__(self, markets, url=WS_URL, depth_limit=20, depth_merge='0', tape_size=1000,
+                 ping_interval=20, max_backoff=30, logger=None):
+        self.markets = [market.upper() for market in markets]
+        self.url = url
+        self.depth_limit = depth_limit
+        self.depth_merge = depth_merge
+        self.tape_size = tape_size
+        self.ping_interval = ping_interval
+        self.max_backoff = max_backoff
+        self.logger = logger or logging
+
+        self._tickers = {}
+        self._books = {market: OrderBook(market) for market in self.markets}
+        self._tapes = {market: deque(maxlen=tape_size) for market in self.markets}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._stopped = False
+        self._ready = threading.Event()
+        self.connected = False
+        self.reconnects = 0
+        self._future = None
+        self._listeners = []
+
+    # ==============================================
+    # READERS (safe to call from any thread)
+    # ==============================================
+
+    def ticker(self, market, max_age=None):
+        """Latest models.Ticker for `market`, or None if missing or older than `max_age` seconds."""
+        ticker = self._tickers.get(market.upper())
+        if ticker is None or (max_age is not None and time.time() - ticker.received > max_age):
+            return None
+        return ticker
+
+    def index_price(self, market, max_age=None):
+        ticker = self.ticker(market, max_age)
+        return ticker.index_price if ticker is not None else None
+
+    def book(self, market) -> OrderBook:
+        """Live order book of `market` (queries on it are thread-safe)."""
+        return self._books[market.upper()]
+
+    def depth(self, market) -> dict:
+        """Copy of the order book as {'asks': [[price, amount], ...] ascending, 'bids': [...] descending}."""
+        return self._books[market.upper()].to_depth()
+
+    def deals(self, market, limit=None) -> list:
+        """Most recent trades, newest first."""
+        with self._lock:
+            tape = list(self._tapes[market.upper()])
+        tape.reverse()
+        return tape[:limit] if limit else tape
+
+    def add_listener(self, callback):
+        """
+        Call `callback(market, ticker)` on every ticker update. It runs on the stream's
+        event loop, so it must only hand the update off (e.g. set an event), never block.
+        """
+        self._listeners.append(callback)
+
+    def wait_ready(self, timeout=None) -> bool:
+        """Block until the first connection has been subscribed."""
+        return self._ready.wait(timeout)
+
+    # ==============================================
+    # MESSAGE HANDLING
+    # ==============================================
+
+    def _request(self, method, params):
+        return fast_json.dumps({'method': method, 'params': params, 'id': next(self._ids)})
+
+    def subscriptions(self) -> list:
+        # A depth.subscribe replaces the connection's previous one, so all books go in one subscribe_multi
+        return [
+            self._request('state.subscribe', self.markets),
+            self._request('deals.subscribe', self.markets),
+            self._request('depth.subscribe_multi',
+                          [[market, self.depth_limit, self.depth_merge, True] for market in self.markets])
+        ]
+
+    def handle_message(self, message):
+        """Apply one server message to the in-memory state."""
+        data = fast_json.loads(message) if isinstance(message, (str, bytes)) else message
+        method = data.get('method')
+        params = data.get('params') or []
+        if method == 'state.update':
+            received = time.time()
+            for update in params:
+                for market, ticker in update.items():
+                    ticker = dict(ticker)
+                    ticker['received'] = received
+                    ticker = self._tickers[market] = Ticker(ticker)
+                    for listener in self._listeners:
+                        try:
+                            listener(market, ticker)
+                        except Exception:
+                            self.logger.exception('Ticker listener failed')
+        elif method == 'depth.update':
+            market = params[2]
+            if market not in self._books:
+                self._books[market] = OrderBook(market)
+            self._books[market].update(params[0], params[1])
+        elif method == 'deals.update':
+            market, deals = params[0], params[1]
+            with self._lock:
+                tape = self._tapes.setdefault(market, deque(maxlen=self.tape_size))
+                # Updates list the newest deal first; the tape is kept oldest first
+                tape.extend(reversed(deals))
+        elif data.get('error'):
+            self.logger.error('WebSocket error: {0}'.format(data['error']))
+
+    # ==============================================
+    # CONNECTION
+    # ==============================================
+
+    async def _ping(self, websocket):
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            await websocket.send(self._request('server.ping', []))
+
+    async def run(self):
+        """Connect, subscribe and consume messages until stop(); reconnects on any failure."""
+        backoff = 1
+        while not self._stopped:
+            try:
+                async with websockets.connect(self.url, ping_interval=None, max_size=None) as websocket:
+                    for subscription in self.subscriptions():
+                        await websocket.send(subscription)
+                    self.connected = True
+                    self._ready.set()
+                    pinger = asyncio.ensure_future(self._ping(websocket))
+                    try:
+                        async for message in websocket:
+                            # Back off afresh only once the server actually serves data, so one
+                            # that accepts and drops connections is not retried every second
+                            backoff = 1
+                            self.handle_message(message)
+                            if self._stopped:
+                                break
+                    finally:
+                        pinger.cancel()
+            except asyncio.CancelledError:
+                raise
+            except Exception as ex:
+                self.logger.warning('WebSocket {0} disconnected: {1}'.format(self.url, ex))
+            self.connected = False
+            if self._stopped:
+                break
+            self.reconnects += 1
+            await asyncio.sleep(backoff * (0.5 + random.random() / 2))
+            backoff = min(backoff * 2, self.max_backoff)
+
+    def start(self, loop_thread):
+        """Run the stream in the background on an async_api.EventLoopThread."""
+        self._stopped = False
+        self._future = asyncio.run_coroutine_threadsafe(self.run(), loop_thread.loop)
+        return self._future
+
+    def stop(self):
+        self._stopped = True
+        if self._future is not None:
+            self._future.cancel()
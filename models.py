@@ -0,0 +1,194 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Typed views over Coinex perpetual API payloads.
+
+Each model wraps the parsed response dict without copying it and exposes
+the commonly used fields as attributes. Numeric fields arrive as strings
+("open_price": "10157.35") and are converted the first time they are read,
+then kept in a slot, so a field nobody reads is never converted and one read
+in a loop is converted once. Any other key of the payload is still reachable
+as an attribute (`position.market`) or through `.raw`.
+
+Numbers are floats by default; call `set_number_type(decimal.Decimal)` to
+get exact decimals instead (models created afterwards convert with it). The
+trading rules in strategy.py do float arithmetic, so MarketTrader expects the
+default.
+"""
+
+from decimal import Decimal
+
+_number = float
+
+
+def set_number_type(number_type):
+    """Use `number_type` (float or decimal.Decimal) for numeric fields converted from now on."""
+    global _number
+    if number_type not in (float, Decimal):
+        raise ValueError('number_type must be float or decimal.Decimal')
+    _number = number_type
+
+
+def number(raw):
+    return _number(raw)
+
+
+class _Field(object):
+    """Lazily converted payload field stored in the slot '_<name>' once read."""
+
+    __slots__ = ('key', 'convert', 'slot')
+
+    def __init__(self, convert=number, key=None):
+        self.key = key
+        self.convert = convert
+        self.slot = None
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        try:
+            return self.slot.__get__(obj, owner)
+        except AttributeError:
+            pass
+        raw = obj.raw.get(self.key)
+        value = None if raw is None or raw == '' else self.convert(raw)
+        self.slot.__set__(obj, value)
+        return value
+
+
+class _ModelMeta(type):
+    """Gives every _Field a backing slot and its payload key (the attribute name unless set)."""
+
+    def __new__(mcs, name, bases, namespace):
+        fields = [key for key, value in namespace.items() if isinstance(value, _Field)]
+        namespace['__slots__'] = tuple('_' + key for key in fields) + tuple(namespace.get('__slots__', ()))
+        cls = super(_ModelMeta, mcs).__new__(mcs, name, bases, namespace)
+        for key in fields:
+            field = namespace[key]
+            field.key = field.key or key
+            field.slot = cls.__dict__['_' + key]
+        return cls
+
+
+class Model(object, metaclass=_ModelMeta):
+    __slots__ = ('raw',)
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    def __getattr__(self, name):
+        # Only reached for names that are neither fields nor slots
+        try:
+            return self.raw[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __repr__(self):
+        return '{0}({1!r})'.format(type(self).__name__, self.raw)
+
+    @classmethod
+    def parse_list(cls, items) -> list:
+        return [cls(item) for item in items or []]
+
+
+class Ticker(Model):
+    """data['ticker'] of get_market_state, or one market of the WebSocket state channel."""
+    last = _Field()
+    index_price = _Field()
+    sign_price = _Field()
+    buy = _Field()
+    sell = _Field()
+    open = _Field()
+    high = _Field()
+    low = _Field()
+    volume = _Field(key='vol')
+    funding_rate_next = _Field()
+
+
+class Position(Model):
+    """One entry of query_position_pending."""
+    position_id = _Field(int)
+    side = _Field(int)
+    amount = _Field()
+    open_price = _Field()
+    liq_price = _Field()
+    leverage = _Field()
+    margin_amount = _Field()
+    profit_real = _Field()
+
+
+class Deal(Model):
+    """One record of query_user_deals."""
+    id = _Field(int)
+    position_id = _Field(int)
+    order_id = _Field(int)
+    side = _Field(int)
+    price = _Field()
+    amount = _Field()
+    deal_profit = _Field()
+    deal_fee = _Field()
+    time = _Field(float)
+
+
+class Order(Model):
+    """An order as returned by put_*_order, query_order_status and query_order_pending."""
+    order_id = _Field(int)
+    position_id = _Field(int)
+    side = _Field(int)
+    type = _Field(int)
+    amount = _Field()
+    price = _Field()
+    left = _Field()
+    deal_stock = _Field()
+    deal_fee = _Field()
+
+
+class StopOrder(Model):
+    """One record of query_stop_pending."""
+    order_id = _Field(int)
+    side = _Field(int)
+    stop_type = _Field(int)
+    amount = _Field()
+    stop_price = _Field()
+    price = _Field()
+
+
+class Account(Model):
+    """Balance of one asset from query_account."""
+    __slots__ = ('asset',)
+
+    available = _Field()
+    frozen = _Field()
+    margin = _Field()
+    balance_total = _Field()
+    transfer = _Field()
+
+    def __init__(self, raw, asset=None):
+        super(Account, self).__init__(raw)
+        self.asset = asset
+
+    @classmethod
+    def parse(cls, data) -> dict:
+        """{asset: Account} from the 'data' of query_account."""
+        return {asset: cls(balance, asset) for asset, balance in (data or {}).items()}
+
+
+class Market(Model):
+    """One market of get_market_info, with its risk_config tiers."""
+    __slots__ = ('risk_limits',)
+
+    stock_prec = _Field(int)
+    money_prec = _Field(int)
+    amount_prec = _Field(int)
+    fee_prec = _Field(int)
+    multiplier = _Field()
+    amount_min = _Field()
+
+    def __init__(self, raw, risk_limits=None):
+        super(Market, self).__init__(raw)
+        # [(position amount up to, max leverage, maintenance margin rate), ...] ascending by amount
+        self.risk_limits = [tuple(float(item) for item in tier) for tier in risk_limits or []]
+
+    @property
+    def leverages(self) -> list:
+        return [int(float(leverage)) for leverage in self.raw.get('leverages', [])]
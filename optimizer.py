@@ -0,0 +1,177 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Parallel parameter sweep for the default strategy.
+
+Candidates (grid or random samples over the `indicator_values` layout plus
+leverage and stop-loss) are backtested across a process pool. The candle
+columns are placed once in shared memory and every worker maps them without
+copying; tasks are grouped by MACD parameters so each worker's Backtester
+indicator cache is reused across runs that only differ in SAR/ADX/risk
+settings.
+"""
+
+import argparse
+import itertools
+import json
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from backtest import Backtester
+
+# Parameter names in run order: indicator_values[0..6], then leverage and stoploss
+PARAMETERS = ('fast', 'slow', 'signal', 'acceleration', 'maximum', 'adx_period', 'adx_level', 'leverage', 'stoploss')
+
+DEFAULT_SPACE = {
+    'fast': [8, 12, 14],
+    'slow': [21, 26],
+    'signal': [9, 15],
+    'acceleration': [0.02],
+    'maximum': [0.2],
+    'adx_period': [14, 24],
+    'adx_level': [15, 20.1, 25],
+    'leverage': [3],
+    'stoploss': [3, 5]
+}
+
+# Worker process state, set by _init_worker
+_backtester = None
+_shared_blocks = []
+
+
+def grid(space: dict) -> list:
+    """All combinations of the parameter space, as tuples in PARAMETERS order."""
+    return [combo for combo in itertools.product(*(space[name] for name in PARAMETERS))
+            if combo[0] < combo[1]]
+
+def sample(space: dict, count: int, seed: int = None) -> list:
+    """
+    `count` distinct random combinations of the parameter space. Each parameter is drawn
+    independently, so spaces too large to enumerate are never built; spaces not much larger
+    than `count` are sampled from the grid instead, where repeats would make drawing slow.
+    """
+    rng = random.Random(seed)
+    values = [list(space[name]) for name in PARAMETERS]
+    size = 1
+    for options in values:
+        size *= len(options)
+    if size <= 4 * count:
+        combos = grid(space)
+        return rng.sample(combos, min(count, len(combos)))
+
+    combos, seen = [], set()
+    for _ in range(100 * count):
+        combo = tuple(rng.choice(options) for options in values)
+        if combo[0] < combo[1] and combo not in seen:
+            seen.add(combo)
+            combos.append(combo)
+            if len(combos) == count:
+                break
+    return combos
+
+
+# ==============================================
+# SHARED MEMORY
+# ==============================================
+
+def share_candles(candles: dict):
+    """Copy candle columns into shared memory; returns (blocks, descriptors for workers)."""
+    blocks, descriptors = [], {}
+    for name, values in candles.items():
+        values = np.ascontiguousarray(values)
+        block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)[:] = values
+        blocks.append(block)
+        descriptors[name] = (block.name, values.shape, values.dtype.str)
+    return blocks, descriptors
+
+def _init_worker(descriptors, backtest_kwargs):
+    global _backtester
+    candles = {}
+    for name, (block_name, shape, dtype) in descriptors.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        _shared_blocks.append(block)  # keep the mapping alive for the worker's lifetime
+        candles[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+    _backtester = Backtester(candles, **backtest_kwargs)
+
+def _run_group(combos):
+    results = []
+    for combo in combos:
+        result = _backtester.run(list(combo[:7]), leverage=combo[7], stoploss=combo[8])
+        row = dict(zip(PARAMETERS, combo))
+        row.update(result.summary())
+        results.append(row)
+    return results
+
+
+# ==============================================
+# OPTIMIZER
+# ==============================================
+
+def optimize(candles: dict, combos, workers=None, sort_by='return_pct', **backtest_kwargs) -> list:
+    """Backtest every combination in parallel and return result rows ranked by `sort_by`."""
+    groups = {}
+    for combo in combos:
+        groups.setdefault(combo[:3], []).append(combo)
+
+    blocks, descriptors = share_candles(candles)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(descriptors, backtest_kwargs)) as executor:
+            rows = [row for group in executor.map(_run_group, groups.values()) for row in group]
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    reverse = sort_by != 'max_drawdown_pct'
+    return sorted(rows, key=lambda row: row[sort_by], reverse=reverse)
+
+def format_table(rows, limit=20) -> str:
+    """Render ranked result rows as a fixed-width text table."""
+    columns = list(PARAMETERS) + ['trades', 'pnl', 'return_pct', 'max_drawdown_pct', 'win_rate_pct']
+    widths = {name: max(len(name), *(len(str(row[name])) for row in rows[:limit])) if rows else len(name)
+              for name in columns}
+    lines = [' '.join(['rank'] + [name.rjust(widths[name]) for name in columns])]
+    for rank, row in enumerate(rows[:limit], start=1):
+        lines.append(' '.join([str(rank).rjust(4)] + [str(row[name]).rjust(widths[name]) for name in columns]))
+    return '\n'.join(lines)
+
+
+if __name__ == "__main__":
+    from candle_store import CandleStore
+
+    parser = argparse.ArgumentParser(description='Parallel parameter sweep over stored candles.')
+    parser.add_argument('market', help='e.g. ETHUSDT')
+    parser.add_argument('--kline-type', default='5min')
+    parser.add_argument('--root', default='candles', help='CandleStore directory')
+    parser.add_argument('--space', help='JSON file mapping parameter names to value lists')
+    parser.add_argument('--random', type=int, help='sample this many combinations instead of the full grid')
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--sort-by', default='return_pct')
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--balance', type=float, default=1000.0)
+    parser.add_argument('--fee', type=float, default=0.0)
+    parser.add_argument('--digits', type=int, default=2)
+    args = parser.parse_args()
+
+    space = dict(DEFAULT_SPACE)
+    if args.space:
+        with open(args.space) as f:
+            space.update(json.load(f))
+    combos = sample(space, args.random, args.seed) if args.random else grid(space)
+
+    candles = {name: np.asarray(values) for name, values in
+               CandleStore(root=args.root).load(args.market, args.kline_type).items()}
+    started = time.perf_counter()
+    rows = optimize(candles, combos, args.workers, args.sort_by,
+                    initial_balance=args.balance, fee=args.fee, truncate_digit=args.digits)
+    elapsed = time.perf_counter() - started
+
+    print(format_table(rows, args.top))
+    print('{0} backtests on {1} candles in {2:.2f}s'.format(len(rows), len(candles['time']), elapsed))
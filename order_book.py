@@ -0,0 +1,185 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+In-memory L2 order book.
+
+Each side keeps its price levels in sorted Python lists (bisect insert/remove
+per level update). Query arrays (prices, amounts and their running sums) are
+rebuilt with NumPy at most once per batch of updates, after which best
+bid/ask, mid and spread are O(1) and depth-within-N-bps and VWAP-to-size are
+a single binary search, O(log n).
+
+Prices and amounts are parsed from Coinex's strings once, when applied.
+"""
+
+import bisect
+import threading
+
+import numpy as np
+
+from api import CoinexPerpetualApi
+
+BUY = CoinexPerpetualApi.ORDER_DIRECTION_BUY
+SELL = CoinexPerpetualApi.ORDER_DIRECTION_SELL
+
+
+class _Side(object):
+    """Price levels of one side, stored ascending by 'key' (price for asks, -price for bids)."""
+
+    def __init__(self, descending):
+        self.sign = -1.0 if descending else 1.0
+        self.keys = []
+        self.amounts = []
+        self._arrays = None
+
+    def clear(self):
+        self.keys, self.amounts, self._arrays = [], [], None
+
+    def set(self, price, amount):
+        key = self.sign * price
+        i = bisect.bisect_left(self.keys, key)
+        exists = i < len(self.keys) and self.keys[i] == key
+        if amount <= 0:
+            if exists:
+                del self.keys[i]
+                del self.amounts[i]
+        elif exists:
+            self.amounts[i] = amount
+        else:
+            self.keys.insert(i, key)
+            self.amounts.insert(i, amount)
+        self._arrays = None
+
+    def arrays(self):
+        """(prices, cumulative amounts, cumulative notional), best level first."""
+        if self._arrays is None:
+            prices = self.sign * np.array(self.keys, dtype=np.float64)
+            amounts = np.array(self.amounts, dtype=np.float64)
+            self._arrays = (prices, np.cumsum(amounts), np.cumsum(prices * amounts))
+        return self._arrays
+
+    def best(self):
+        if not self.keys:
+            return None
+        return self.sign * self.keys[0], self.amounts[0]
+
+    def levels(self):
+        return [[self.sign * key, amount] for key, amount in zip(self.keys, self.amounts)]
+
+
+class OrderBook(object):
+
+    def __init__(self, market=None):
+        self.market = market
+        self.asks = _Side(descending=False)
+        self.bids = _Side(descending=True)
+        self.time = None
+        self._lock = threading.Lock()
+
+    # ==============================================
+    # UPDATES
+    # ==============================================
+
+    def _apply(self, asks, bids):
+        for price, amount in asks:
+            self.asks.set(float(price), float(amount))
+        for price, amount in bids:
+            self.bids.set(float(price), float(amount))
+
+    def apply_snapshot(self, asks, bids, timestamp=None):
+        """Replace the book with `asks`/`bids` given as [[price, amount], ...]."""
+        with self._lock:
+            self.asks.clear()
+            self.bids.clear()
+            self._apply(asks, bids)
+            self.time = timestamp
+
+    def apply_diff(self, asks, bids, timestamp=None):
+        """Update levels in place; an amount of 0 removes the level."""
+        with self._lock:
+            self._apply(asks, bids)
+            self.time = timestamp
+
+    def update(self, full, depth):
+        """Apply a Coinex depth payload ({'asks', 'bids', 'time'}) as snapshot or diff."""
+        if full:
+            self.apply_snapshot(depth.get('asks', []), depth.get('bids', []), depth.get('time'))
+        else:
+            self.apply_diff(depth.get('asks', []), depth.get('bids', []), depth.get('time'))
+
+    @classmethod
+    def from_depth(cls, data, market=None):
+        """Build a book from the 'data' of CoinexPerpetualApi.depth."""
+        book = cls(market)
+        book.update(True, data)
+        return book
+
+    def to_depth(self) -> dict:
+        """Levels as {'asks': ascending, 'bids': descending, 'time'}."""
+        with self._lock:
+            return {'asks': self.asks.levels(), 'bids': self.bids.levels(), 'time': self.time}
+
+    # ==============================================
+    # QUERIES
+    # ==============================================
+
+    def best_bid(self):
+        """(price, amount) of the best bid, or None."""
+        return self.bids.best()
+
+    def best_ask(self):
+        """(price, amount) of the best ask, or None."""
+        return self.asks.best()
+
+    def mid(self):
+        bid, ask = self.bids.best(), self.asks.best()
+        if bid is None or ask is None:
+            return None
+        return (bid[0] + ask[0]) / 2.0
+
+    def spread(self):
+        bid, ask = self.bids.best(), self.asks.best()
+        if bid is None or ask is None:
+            return None
+        return ask[0] - bid[0]
+
+    def spread_bps(self):
+        spread, mid = self.spread(), self.mid()
+        return None if spread is None or not mid else 10000.0 * spread / mid
+
+    def _side_for(self, side):
+        """Levels a market order of `side` consumes: buys take asks, sells take bids."""
+        return self.asks if side == BUY else self.bids
+
+    def depth_within_bps(self, side, bps) -> float:
+        """Amount available to a market order of `side` within `bps` of the best price."""
+        with self._lock:
+            book_side = self._side_for(side)
+            best = book_side.best()
+            if best is None:
+                return 0.0
+            cum_amount = book_side.arrays()[1]
+            limit = best[0] * (1 + bps / 10000.0) if side == BUY else best[0] * (1 - bps / 10000.0)
+            # keys are ascending in sign*price, so search on the signed limit
+            count = bisect.bisect_right(book_side.keys, book_side.sign * limit)
+            return float(cum_amount[count - 1]) if count else 0.0
+
+    def vwap(self, side, size):
+        """Average fill price of a market order of `side` for `size`, or None if the book is too thin."""
+        if size <= 0:
+            return None
+        with self._lock:
+            prices, cum_amount, cum_notional = self._side_for(side).arrays()
+            if not cum_amount.size or cum_amount[-1] < size:
+                return None
+            i = int(np.searchsorted(cum_amount, size, side='left'))
+            filled = cum_amount[i - 1] if i else 0.0
+            notional = cum_notional[i - 1] if i else 0.0
+            return float((notional + (size - filled) * prices[i]) / size)
+
+    def slippage_bps(self, side, size):
+        """Expected slippage of a market order versus the mid price, in bps (None if unknown)."""
+        price, mid = self.vwap(side, size), self.mid()
+        if price is None or not mid:
+            return None
+        return 10000.0 * (price - mid) / mid if side == BUY else 10000.0 * (mid - price) / mid
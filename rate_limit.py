@@ -0,0 +1,111 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import asyncio
+import threading
+import time
+
+
+class TokenBucket(object):
+    """
+    Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`.
+
+    One bucket shared by every market's requests keeps the whole process
+    within the exchange's limit no matter how many markets are traded.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens):
+        """Take `tokens` now (possibly going negative) and return how long to wait for them."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self, tokens=1):
+        """Block until `tokens` are available; returns the time waited in seconds."""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens=1):
+        """Like acquire(), but waits with asyncio.sleep so the event loop keeps running."""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def try_acquire(self, tokens=1):
+        """Take `tokens` if available right now, without waiting."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+
+# ==============================================
+# ENDPOINT CLASSES
+# ==============================================
+
+PUBLIC = 'public'    # Unsigned market data (tickers, depth, klines, ...)
+PRIVATE = 'private'  # Signed reads (balances, positions, orders, deals)
+ORDER = 'order'      # Signed writes (place, cancel and close orders, leverage)
+
+# Requests per second per endpoint class
+DEFAULT_RATES = {
+    PUBLIC: 20,
+    PRIVATE: 10,
+    ORDER: 10
+}
+
+
+def endpoint_class(method, sign=True):
+    """Endpoint class of a Coinex request: every POST changes orders, signed GETs are private reads."""
+    if method == 'POST':
+        return ORDER
+    return PRIVATE if sign else PUBLIC
+
+
+class EndpointLimiter(object):
+    """
+    One TokenBucket per endpoint class, so a burst of market-data reads never
+    delays an order and vice versa.
+
+    Share one instance between the synchronous and asyncio clients to keep
+    them within the same budget.
+    """
+
+    def __init__(self, rates=None):
+        """
+        # params:
+            rates   {endpoint class: requests per second or (rate, capacity)}, merged over DEFAULT_RATES
+        """
+        rates = dict(DEFAULT_RATES, **(rates or {}))
+        self.buckets = {}
+        for name, rate in rates.items():
+            self.buckets[name] = TokenBucket(*rate) if isinstance(rate, (tuple, list)) else TokenBucket(rate)
+
+    def acquire(self, endpoint, tokens=1):
+        bucket = self.buckets.get(endpoint)
+        return bucket.acquire(tokens) if bucket is not None else 0.0
+
+    async def acquire_async(self, endpoint, tokens=1):
+        bucket = self.buckets.get(endpoint)
+        return await bucket.acquire_async(tokens) if bucket is not None else 0.0
+
+    def try_acquire(self, endpoint, tokens=1):
+        bucket = self.buckets.get(endpoint)
+        return bucket.try_acquire(tokens) if bucket is not None else True
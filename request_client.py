@@ -1,98 +1,151 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
-import copy
 import hashlib
 import logging
+import re
 import time
 import traceback
+from urllib.parse import urlencode
 
 import requests
 
+import fast_json
+import resilience
+from http_pool import PoolStats, make_session
+from rate_limit import EndpointLimiter, endpoint_class
+
+
+# Values made only of these characters are identical before and after URL encoding
+_URL_SAFE = re.compile(r'[A-Za-z0-9_.~-]*')
+
+
+class RequestSigner(object):
+    """
+    Serializes request parameters once and signs that exact string.
+
+    The `&secret_key=...` suffix and the signed header set are built once per
+    key; inputs are never modified. The signature covers the raw `k=v&...`
+    string in the order given, and when every value is URL-safe the same
+    string is also sent as the query or body; otherwise the transport gets it
+    URL-encoded.
+    """
+
+    def __init__(self, access_id, secret_key, headers):
+        self.headers = dict(headers)
+        self.signed_headers = dict(headers, AccessId=access_id)
+        self.suffix = '&secret_key={0}'.format(secret_key).encode()
+
+    def encode(self, params, timestamp):
+        """(string to sign, string to send) for `params` plus `timestamp`."""
+        items = [(k, v) for k, v in params.items() if k != 'timestamp'] if params else []
+        items.append(('timestamp', timestamp))
+        pairs = [(str(k), str(v)) for k, v in items]
+        raw = '&'.join([k + '=' + v for k, v in pairs])
+        if all(_URL_SAFE.fullmatch(k) and _URL_SAFE.fullmatch(v) for k, v in pairs):
+            return raw, raw
+        return raw, urlencode(pairs)
+
+    def sign(self, raw) -> str:
+        return hashlib.sha256(raw.encode() + self.suffix).hexdigest()
+
+    def prepare(self, params, sign):
+        """(encoded parameters, headers) for one request, timestamped now."""
+        raw, encoded = self.encode(params, int(time.time() * 1000))
+        if not sign:
+            return encoded, self.headers
+        headers = dict(self.signed_headers)
+        headers['Authorization'] = self.sign(raw)
+        return encoded, headers
+
 
 class RequestClient(object):
-    __headers = {
+    DEFAULT_HEADERS = {
         'Content-Type': 'application/json; charset=utf-8',
         'Accept': 'application/json',
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/60.0.3112.90 Safari/537.36'
     }
 
-    def __init__(self, access_id, secret_key, logger=None, debug=False):
+    def __init__(self, access_id, secret_key, logger=None, debug=False, pool_size=10, rate_limiter=None,
+                 rate_limits=None, breakers=None, max_retries=2, backoff_base=0.25, backoff_cap=2.0,
+                 pool_connections=1, pool_block=False, keepalive=True, http2=False):
         self.access_id = access_id
         self.secret_key = secret_key
-        self.headers = self.__headers
+        self.headers = self.DEFAULT_HEADERS
+        self.signer = RequestSigner(access_id, secret_key, self.headers)
         self.host = 'https://api.coinex.com/perpetual'
-        session = requests.Session()
-        session.mount('https://', requests.adapters.HTTPAdapter())
-        session.mount('https://', requests.adapters.HTTPAdapter())
-        self.http_client = session
         self.logger = logger or logging
+        # One pooled keep-alive connection per concurrent caller (e.g. per traded market);
+        # see http_pool.make_session for the options
+        self.stats = PoolStats()
+        self.http_client = make_session(self.stats, pool_size, pool_connections, pool_block, keepalive, http2,
+                                        self.logger)
+        # Token buckets per endpoint class (rate_limit.EndpointLimiter); pass one in to share
+        # it with other clients, otherwise one is built from `rate_limits`
+        self.rate_limiter = rate_limiter or EndpointLimiter(rate_limits)
+        # Circuit breaker per endpoint (resilience.EndpointBreakers), shareable like the limiter;
+        # GETs are retried up to `max_retries` times with jittered exponential backoff
+        self.breakers = breakers or resilience.EndpointBreakers()
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
 
-    @staticmethod
-    def get_sign(params, secret_key):
-        data = ['='.join([str(k), str(v)]) for k, v in params.items()]
-
-        str_params = "{0}&secret_key={1}".format(
-            '&'.join(data), secret_key).encode()
-
-        token = hashlib.sha256(str_params).hexdigest()
-        return token
+    def pool_stats(self) -> dict:
+        """Requests sent, connections opened/reused and average connect and TLS handshake time."""
+        return self.stats.as_dict()
 
-    def set_authorization(self, params, headers):
-        headers['AccessId'] = self.access_id
-        headers['Authorization'] = self.get_sign(params, self.secret_key)
+    def close(self):
+        self.http_client.close()
 
     def get(self, path, params=None, sign=True):
-        url = self.host + path
-        params = params or {}
-        params['timestamp'] = int(time.time() * 1000)
-        headers = copy.copy(self.headers)
-        if sign:
-            self.set_authorization(params, headers)
-        try:
-            response = self.http_client.get(
-                url, params=params, headers=headers, timeout=5)
-            # self.logger.info(response.request.url)
-            if response.status_code == requests.codes.ok:
-                return response.json()
-            else:
-                self.logger.error(
-                    'URL: {0}\nSTATUS_CODE: {1}\nResponse: {2}'.format(
-                        response.request.url,
-                        response.status_code,
-                        response.text
-                    )
-                )
-                return None
-        except Exception as ex:
-            trace_info = traceback.format_exc()
-            self.logger.error('GET {url} failed: \n{trace_info}'.format(
-                url=url, trace_info=trace_info))
-            return None
+        return self._request('GET', path, params, sign, timeout=5, retries=self.max_retries)
 
     def post(self, path, data=None):
+        # Order writes are not idempotent, so a failed POST is never sent again
+        return self._request('POST', path, data, True, timeout=10, retries=0)
+
+    def _request(self, method, path, params, sign, timeout, retries):
         url = self.host + path
-        data = data or {}
-        data['timestamp'] = int(time.time() * 1000)
-        headers = copy.copy(self.headers)
-        self.set_authorization(data, headers)
-        try:
-            response = self.http_client.post(
-                url, data=data, headers=headers, timeout=10)
-            # self.logger.info(response.request.url)
-            if response.status_code == requests.codes.ok:
-                return response.json()
-            else:
-                self.logger.error(
-                    'URL: {0}\nSTATUS_CODE: {1}\nResponse: {2}'.format(
-                        response.request.url,
-                        response.status_code,
-                        response.text
+        breaker = self.breakers.get(path)
+        payload = None
+        for attempt in range(retries + 1):
+            if not breaker.allow():
+                self.logger.error('{0} {1} skipped: endpoint circuit is open'.format(method, url))
+                return payload
+            if attempt:
+                time.sleep(resilience.backoff_delay(attempt, self.backoff_base, self.backoff_cap))
+            self.rate_limiter.acquire(endpoint_class(method, sign))
+            encoded, headers = self.signer.prepare(params, sign)
+            try:
+                if method == 'GET':
+                    response = self.http_client.get(
+                        url + '?' + encoded, headers=headers, timeout=timeout)
+                else:
+                    response = self.http_client.post(
+                        url, data=encoded, headers=headers, timeout=timeout)
+                # self.logger.info(response.request.url)
+                if response.status_code == requests.codes.ok:
+                    payload = fast_json.loads(response.content)
+                    outcome = resilience.classify_response(payload)
+                else:
+                    self.logger.error(
+                        'URL: {0}\nSTATUS_CODE: {1}\nResponse: {2}'.format(
+                            response.request.url,
+                            response.status_code,
+                            response.text
+                        )
                     )
-                )
-                return None
-        except Exception as ex:
-            trace_info = traceback.format_exc()
-            self.logger.error('POST {url} failed: \n{trace_info}'.format(
-                url=url, trace_info=trace_info))
-            return None
+                    payload = None
+                    outcome = resilience.classify_status(response.status_code)
+            except Exception as ex:
+                trace_info = traceback.format_exc()
+                self.logger.error('{method} {url} failed: \n{trace_info}'.format(
+                    method=method, url=url, trace_info=trace_info))
+                payload = None
+                outcome = resilience.RETRY
+            breaker.record(outcome)
+            if outcome == resilience.FATAL:
+                self.logger.error('{0} {1} rejected credentials: {2}'.format(method, url, payload))
+            if outcome != resilience.RETRY:
+                break
+        return payload
@@ -0,0 +1,130 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Retry and circuit-breaker helpers shared by RequestClient and AsyncRequestClient.
+
+Every answer (or transport failure) is classified into one of four outcomes:
+
+    OK        success
+    RETRY     transient: timeouts, connection errors, 429/5xx, Coinex "busy",
+              "timeout", "too frequent" or "request expired" codes
+    FATAL     credentials or permissions are wrong; retrying cannot help
+    REJECTED  the exchange understood and refused the request (e.g.
+              insufficient balance); the endpoint itself is healthy
+
+Idempotent GETs are retried on RETRY with bounded exponential backoff and
+full jitter. Each endpoint has a CircuitBreaker that opens after repeated
+RETRY outcomes, so calls to a degraded endpoint fail immediately instead of
+waiting on timeouts, and lets one probe through after `reset_timeout`.
+"""
+
+import random
+import threading
+import time
+
+OK = 'ok'
+RETRY = 'retry'
+FATAL = 'fatal'
+REJECTED = 'rejected'
+
+# Coinex error codes worth retrying: internal error, service unavailable/timeout/busy,
+# too many requests and request expired (a new timestamp is signed on every attempt)
+RETRYABLE_CODES = {3, 35, 36, 213, 227, 3008, 4001, 4002, 4003, 4010, 4213}
+
+# Coinex error codes caused by the API key: wrong AccessID or signature, IP not allowed,
+# permission not enabled, user prohibited
+FATAL_CODES = {23, 24, 25, 4005, 4006, 4007, 4008, 4009, 4011}
+
+
+def classify_status(status):
+    """Outcome of a non-200 HTTP status."""
+    if status == 429 or status >= 500:
+        return RETRY
+    if status in (401, 403):
+        return FATAL
+    return REJECTED
+
+
+def classify_response(payload):
+    """Outcome of a parsed Coinex response ({'code', 'data', 'message'})."""
+    if not isinstance(payload, dict):
+        return RETRY
+    code = payload.get('code')
+    if code == 0:
+        return OK
+    if code in RETRYABLE_CODES:
+        return RETRY
+    if code in FATAL_CODES:
+        return FATAL
+    return REJECTED
+
+
+def backoff_delay(attempt, base=0.25, cap=2.0):
+    """Full-jitter exponential backoff before retry number `attempt` (1-based)."""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker(object):
+    """
+    Opens after `failure_threshold` consecutive transient failures; while open,
+    allow() is False until `reset_timeout` seconds have passed, then a single
+    probe is let through and its outcome closes or re-opens the breaker.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened = None
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record(self, outcome):
+        """Count a classified outcome; only RETRY is a failure of the endpoint."""
+        with self._lock:
+            if outcome != RETRY:
+                self.state = self.CLOSED
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened = time.monotonic()
+
+
+class EndpointBreakers(object):
+    """
+    One CircuitBreaker per request path, created on first use. Share one
+    instance between the synchronous and asyncio clients so both see the same
+    endpoint health.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.breakers = {}
+        self._lock = threading.Lock()
+
+    def get(self, path) -> CircuitBreaker:
+        with self._lock:
+            breaker = self.breakers.get(path)
+            if breaker is None:
+                breaker = self.breakers[path] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return breaker
+
+    def open_endpoints(self) -> list:
+        with self._lock:
+            return [path for path, breaker in self.breakers.items() if breaker.state != CircuitBreaker.CLOSED]
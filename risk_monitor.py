@@ -0,0 +1,84 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Risk loop running alongside the signal cycles.
+
+RiskMonitor evaluates every trader's break-even rule (MarketTrader.risk_free)
+as prices move instead of once per candle. With a MarketStream it is woken
+by each ticker update; otherwise, and as a fallback when the stream goes
+quiet, it polls every `interval` seconds. Updates are coalesced to the
+latest price per market and each market is checked at most once per
+`interval`, on a worker thread, so one slow market never holds up another.
+risk_free() itself is idempotent, which makes the rate of checks safe.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class RiskMonitor(object):
+
+    def __init__(self, traders, market_stream=None, interval=1.0, logger=None):
+        """
+        # params:
+            traders         trader.MarketTrader instances to protect
+            market_stream   optional market_stream.MarketStream whose ticker updates trigger checks
+            interval        minimum seconds between checks of one market, and the polling period
+        """
+        self.traders = {market_trader.market: market_trader for market_trader in traders}
+        self.market_stream = market_stream
+        self.interval = interval
+        self.logger = logger or logging
+        self.checks = 0
+        self._prices = {}
+        self._checked = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, len(self.traders)))
+        if market_stream is not None:
+            market_stream.add_listener(self.on_ticker)
+
+    def on_ticker(self, market, ticker):
+        """MarketStream listener: remember the latest price and wake the loop."""
+        if market in self.traders and ticker.index_price is not None:
+            with self._lock:
+                self._prices[market] = ticker.index_price
+            self._wake.set()
+
+    def _check(self, market_trader, price):
+        try:
+            market_trader.risk_free(price)
+        except Exception:
+            self.logger.exception('Risk check for {0} failed'.format(market_trader.market))
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            now = time.monotonic()
+            with self._lock:
+                prices, self._prices = self._prices, {}
+            for market, market_trader in self.traders.items():
+                if now - self._checked.get(market, 0) < self.interval:
+                    if market in prices:
+                        # Too soon for this market; keep the price for the next pass
+                        with self._lock:
+                            self._prices.setdefault(market, prices[market])
+                    continue
+                self._checked[market] = now
+                self.checks += 1
+                self._executor.submit(self._check, market_trader, prices.get(market))
+
+    def start(self):
+        """Run the loop in a daemon thread."""
+        thread = threading.Thread(target=self.run_forever, name='risk-monitor', daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        self._executor.shutdown(wait=False)
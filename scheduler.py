@@ -0,0 +1,142 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Candle-aligned scheduler.
+
+Jobs are registered per Coinex kline type ('5min', '1hour', ...). The
+scheduler thread sleeps until the earliest next candle close (plus a small
+`delay` so the exchange has rolled the candle), computed from the wall clock
+every time so it never drifts, then hands each due job to a worker thread and
+goes straight back to waiting. A slow cycle therefore never delays the next
+trigger. How late each trigger fired relative to its scheduled time is
+recorded per job.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from candle_store import KLINE_SECONDS
+
+# Coinex weekly candles open on Monday 00:00 UTC; the Unix epoch was a Thursday
+WEEK_ANCHOR = 4 * 86400
+
+
+def next_close(kline_type, now=None, delay=0.0):
+    """Unix time of the first close of a `kline_type` candle strictly after `now`, plus `delay`."""
+    now = time.time() if now is None else now
+    period = KLINE_SECONDS[kline_type]
+    anchor = WEEK_ANCHOR if kline_type == '1week' else 0
+    return ((now - delay - anchor) // period + 1) * period + anchor + delay
+
+
+class Job(object):
+
+    def __init__(self, name, kline_type, callback, args, history):
+        self.name = name
+        self.kline_type = kline_type
+        self.callback = callback
+        self.args = args
+        self.due = None
+        self.running = 0
+        self.overlaps = 0
+        self.lateness = deque(maxlen=history)
+
+
+class CandleScheduler(object):
+
+    def __init__(self, delay=0.5, history=100, max_workers=None, logger=None):
+        """
+        # params:
+            delay         seconds after each candle close to trigger, so the closed candle is available
+            history       number of lateness samples kept per job
+            max_workers   threads running callbacks (default: one per job, plus one)
+        """
+        self.delay = delay
+        self.history = history
+        self.max_workers = max_workers
+        self.logger = logger or logging
+        self.jobs = []
+        self._stop = threading.Event()
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def every(self, kline_type, callback, *args, name=None):
+        """Call `callback(*args)` after every close of a `kline_type` candle."""
+        if kline_type not in KLINE_SECONDS:
+            raise ValueError('Unknown kline type: {0}'.format(kline_type))
+        job = Job(name or kline_type, kline_type, callback, args, self.history)
+        self.jobs.append(job)
+        return job
+
+    # ==============================================
+    # RUNNING
+    # ==============================================
+
+    def _run_job(self, job):
+        try:
+            job.callback(*job.args)
+        except Exception:
+            self.logger.exception('Scheduled job {0} failed'.format(job.name))
+        finally:
+            with self._lock:
+                job.running -= 1
+
+    def _dispatch(self, job, now):
+        job.lateness.append(now - job.due)
+        with self._lock:
+            if job.running:
+                # The previous cycle is still going; start this one anyway rather than slip
+                job.overlaps += 1
+                self.logger.warning('Job {0} started while its previous cycle is still running'.format(job.name))
+            job.running += 1
+        self._executor.submit(self._run_job, job)
+
+    def run_forever(self):
+        """Trigger jobs at their candle closes until stop() is called."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers or len(self.jobs) + 1)
+        now = time.time()
+        for job in self.jobs:
+            job.due = next_close(job.kline_type, now, self.delay)
+        while not self._stop.is_set() and self.jobs:
+            due = min(job.due for job in self.jobs)
+            wait = due - time.time()
+            if wait > 0 and self._stop.wait(wait):
+                break
+            now = time.time()
+            for job in self.jobs:
+                if job.due <= now:
+                    self._dispatch(job, now)
+                    job.due = next_close(job.kline_type, now, self.delay)
+
+    def start(self):
+        """Run the scheduler in a daemon thread."""
+        thread = threading.Thread(target=self.run_forever, name='candle-scheduler', daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self._stop.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    # ==============================================
+    # METRICS
+    # ==============================================
+
+    def lateness_stats(self) -> dict:
+        """Per job: cycles triggered, last/average/worst lateness in ms and overlapping cycles."""
+        stats = {}
+        for job in self.jobs:
+            samples = list(job.lateness)
+            stats[job.name] = {
+                'cycles': len(samples),
+                'last_ms': 1000 * samples[-1] if samples else None,
+                'avg_ms': 1000 * sum(samples) / len(samples) if samples else None,
+                'max_ms': 1000 * max(samples) if samples else None,
+                'overlaps': job.overlaps
+            }
+        return stats
@@ -0,0 +1,355 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Composable strategies built from indicator outputs.
+
+A strategy is a rule tree over indicator specs. Rules are either directional
+(they vote ORDER_DIRECTION_BUY, ORDER_DIRECTION_SELL or 0) or filters (they
+permit trading or not), and combine with `&`:
+
+    Strategy('trend', MACDCross(14, 21, 15) & SARSide(0.02, 0.2) & ADXAbove(24, 20.1))
+
+Every rule declares the indicator specs it reads. `dependencies()` merges
+them for all strategies of a market, so each indicator is computed once per
+candle however many strategies use it, and the results are handed to the
+strategies as a `Snapshot`. A snapshot is only data, so the same Strategy
+object runs in MarketTrader (from the local indicators or taapi.io) and in
+Backtester.run (from the vectorized series).
+"""
+
+from collections import namedtuple
+
+import indicators
+import indicator_state
+import strategy
+from strategy import ORDER_DIRECTION_BUY, ORDER_DIRECTION_SELL
+
+# Output of an indicator on the last closed candle and the one before
+Value = namedtuple('Value', ['value', 'previous'])
+
+MISSING = Value(None, None)
+
+
+# ==============================================
+# INDICATOR SPECS
+# ==============================================
+
+class Indicator(object):
+    """An indicator with fixed parameters; equal specs are computed only once."""
+    name = None
+
+    def __init__(self, *params):
+        self.params = params
+
+    @property
+    def id(self) -> str:
+        """Name usable as IndicatorSet key and taapi.io bulk id."""
+        return '_'.join([self.name] + [str(param) for param in self.params])
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.params == other.params
+
+    def __hash__(self):
+        return hash((self.name, self.params))
+
+    def __repr__(self):
+        return '{0}({1})'.format(self.name.upper(), ', '.join(str(param) for param in self.params))
+
+    def state(self) -> indicator_state.IndicatorState:
+        """Streaming state for live trading."""
+        raise NotImplementedError
+
+    def read_state(self, state) -> Value:
+        return Value(state.value, state.previous)
+
+    def series(self, candles):
+        """Vectorized output over stored candles, for backtesting."""
+        raise NotImplementedError
+
+    def taapi(self) -> tuple:
+        """(taapi.io indicator, parameters)."""
+        raise NotImplementedError
+
+    def read_taapi(self, data) -> Value:
+        return Value(float(data[1]['value']), float(data[2]['value']))
+
+
+class MACD(Indicator):
+    """MACD histogram."""
+    name = 'macd'
+
+    def __init__(self, fast=12, slow=26, signal=9):
+        super(MACD, self).__init__(int(float(fast)), int(float(slow)), int(float(signal)))
+
+    def state(self):
+        return indicator_state.MACDState(*self.params)
+
+    def series(self, candles):
+        return indicators.macd(candles['close'], *self.params)[2]
+
+    def taapi(self):
+        fast, slow, signal = self.params
+        return 'macd', {'backtracks': 3, 'optInFastPeriod': fast, 'optInSlowPeriod': slow,
+                        'optInSignalPeriod': signal}
+
+    def read_taapi(self, data):
+        return Value(float(data[1]['valueMACDHist']), float(data[2]['valueMACDHist']))
+
+
+class SAR(Indicator):
+    name = 'sar'
+
+    def __init__(self, acceleration=0.02, maximum=0.2):
+        super(SAR, self).__init__(float(acceleration), float(maximum))
+
+    def state(self):
+        return indicator_state.SARState(*self.params)
+
+    def series(self, candles):
+        return indicators.parabolic_sar(candles['high'], candles['low'], *self.params)
+
+    def taapi(self):
+        acceleration, maximum = self.params
+        return 'sar', {'backtracks': 3, 'optInAcceleration': acceleration, 'optInMaximum': maximum}
+
+
+class ADX(Indicator):
+    name = 'adx'
+
+    def __init__(self, period=14):
+        super(ADX, self).__init__(int(float(period)))
+
+    def state(self):
+        return indicator_state.ADXState(*self.params)
+
+    def series(self, candles):
+        return indicators.adx(candles['high'], candles['low'], candles['close'], *self.params)
+
+    def taapi(self):
+        return 'adx', {'backtracks': 3, 'optInTimePeriod': self.params[0]}
+
+
+class RSI(Indicator):
+    name = 'rsi'
+
+    def __init__(self, period=14):
+        super(RSI, self).__init__(int(float(period)))
+
+    def state(self):
+        return indicator_state.RSIState(*self.params)
+
+    def series(self, candles):
+        return indicators.rsi(candles['close'], *self.params)
+
+    def taapi(self):
+        return 'rsi', {'backtracks': 3, 'optInTimePeriod': self.params[0]}
+
+
+class Supertrend(Indicator):
+    """Supertrend direction: 1 long, -1 short."""
+    name = 'supertrend'
+
+    def __init__(self, period=10, multiplier=3.0):
+        super(Supertrend, self).__init__(int(float(period)), float(multiplier))
+
+    def state(self):
+        return indicator_state.SupertrendState(*self.params)
+
+    def read_state(self, state):
+        return Value(state.direction, state.previous_direction)
+
+    def series(self, candles):
+        return indicators.supertrend(candles['high'], candles['low'], candles['close'], *self.params)[1]
+
+    def taapi(self):
+        period, multiplier = self.params
+        return 'supertrend', {'backtracks': 3, 'period': period, 'multiplier': multiplier}
+
+    def read_taapi(self, data):
+        direction = {'long': 1, 'short': -1}
+        return Value(direction.get(data[1]['valueAdvice']), direction.get(data[2]['valueAdvice']))
+
+
+class Snapshot(object):
+    """Indicator values and close price of the last closed candle."""
+
+    def __init__(self, close, values):
+        self.close = close
+        self.values = values
+
+    def __getitem__(self, indicator) -> Value:
+        return self.values.get(indicator, MISSING)
+
+
+# ==============================================
+# RULES
+# ==============================================
+
+class Rule(object):
+    directional = True
+
+    def dependencies(self) -> set:
+        raise NotImplementedError
+
+    def evaluate(self, snapshot) -> int:
+        raise NotImplementedError
+
+    def __and__(self, other):
+        return All(self, other)
+
+
+class MACDCross(Rule):
+    """Buy when the MACD histogram crosses above zero, sell when it crosses below."""
+
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.macd = MACD(fast, slow, signal)
+
+    def dependencies(self):
+        return {self.macd}
+
+    def evaluate(self, snapshot):
+        value = snapshot[self.macd]
+        if value.value is None or value.previous is None:
+            return 0
+        return strategy.macd_signal(value.value, value.previous)
+
+
+class SARSide(Rule):
+    """Buy while SAR is below the close, sell while it is above."""
+
+    def __init__(self, acceleration=0.02, maximum=0.2):
+        self.sar = SAR(acceleration, maximum)
+
+    def dependencies(self):
+        return {self.sar}
+
+    def evaluate(self, snapshot):
+        sar = snapshot[self.sar].value
+        if sar is None or snapshot.close is None:
+            return 0
+        return strategy.sar_signal(snapshot.close, sar)
+
+
+class SupertrendFlip(Rule):
+    """Buy when Supertrend turns long, sell when it turns short."""
+
+    def __init__(self, period=10, multiplier=3.0):
+        self.supertrend = Supertrend(period, multiplier)
+
+    def dependencies(self):
+        return {self.supertrend}
+
+    def evaluate(self, snapshot):
+        value = snapshot[self.supertrend]
+        if value.previous == -1 and value.value == 1:
+            return ORDER_DIRECTION_BUY
+        elif value.previous == 1 and value.value == -1:
+            return ORDER_DIRECTION_SELL
+        return 0
+
+
+class ADXAbove(Rule):
+    """Filter: trade only while ADX is above `level`."""
+    directional = False
+
+    def __init__(self, period=14, level=20):
+        self.adx = ADX(period)
+        self.level = float(level)
+
+    def dependencies(self):
+        return {self.adx}
+
+    def evaluate(self, snapshot):
+        adx = snapshot[self.adx].value
+        return 0 if adx is None else strategy.adx_signal(adx, self.level)
+
+
+class RSIBetween(Rule):
+    """Filter: trade only while RSI is between `low` and `high` (not overbought or oversold)."""
+    directional = False
+
+    def __init__(self, period=14, low=30, high=70):
+        self.rsi = RSI(period)
+        self.low = float(low)
+        self.high = float(high)
+
+    def dependencies(self):
+        return {self.rsi}
+
+    def evaluate(self, snapshot):
+        rsi = snapshot[self.rsi].value
+        return 1 if rsi is not None and self.low < rsi < self.high else 0
+
+
+class All(Rule):
+    """Directional rules must agree on a direction and every filter must pass."""
+
+    def __init__(self, *rules):
+        self.rules = []
+        for rule in rules:
+            self.rules.extend(rule.rules if isinstance(rule, All) else [rule])
+        self.directional = any(rule.directional for rule in self.rules)
+
+    def dependencies(self):
+        return set().union(*(rule.dependencies() for rule in self.rules))
+
+    def evaluate(self, snapshot):
+        direction = None
+        for rule in self.rules:
+            result = rule.evaluate(snapshot)
+            if not result:
+                return 0
+            if rule.directional:
+                if direction is not None and result != direction:
+                    return 0
+                direction = result
+        return direction if direction is not None else 1
+
+
+# ==============================================
+# STRATEGIES
+# ==============================================
+
+class Strategy(object):
+
+    def __init__(self, name, rule):
+        if not rule.directional:
+            raise ValueError('Strategy {0} needs at least one directional rule'.format(name))
+        self.name = name
+        self.rule = rule
+
+    def __repr__(self):
+        return 'Strategy({0!r})'.format(self.name)
+
+    def dependencies(self) -> set:
+        return self.rule.dependencies()
+
+    def signal(self, snapshot) -> int:
+        """ORDER_DIRECTION_BUY, ORDER_DIRECTION_SELL or 0 for the candle in `snapshot`."""
+        return self.rule.evaluate(snapshot)
+
+
+def default_strategy(indicator_values=None) -> Strategy:
+    """MACD cross confirmed by SAR side, filtered by ADX (strategy.combine_signals)."""
+    values = list(indicator_values or strategy.DEFAULT_INDICATOR_VALUES)
+    return Strategy('default', MACDCross(values[0], values[1], values[2])
+                    & SARSide(values[3], values[4])
+                    & ADXAbove(values[5], values[6]))
+
+
+def dependencies(strategies) -> list:
+    """Union of the indicators the strategies read, each listed once."""
+    specs = set().union(*(item.dependencies() for item in strategies))
+    return sorted(specs, key=lambda spec: spec.id)
+
+
+def decide(strategies, snapshot) -> int:
+    """Combined signal: the direction all strategies that signal agree on, 0 on conflict."""
+    direction = 0
+    for item in strategies:
+        result = item.signal(snapshot)
+        if result:
+            if direction and result != direction:
+                return 0
+            direction = result
+    return direction
@@ -0,0 +1,86 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Trading rules of the default strategy, free of any I/O.
+
+Main.py applies them to live exchange data and backtest.py replays them over
+stored candles, so both always trade the exact same logic.
+"""
+
+from api import CoinexPerpetualApi
+
+ORDER_DIRECTION_SELL = CoinexPerpetualApi.ORDER_DIRECTION_SELL
+ORDER_DIRECTION_BUY = CoinexPerpetualApi.ORDER_DIRECTION_BUY
+
+# Share of the available balance committed per trade (before leverage)
+POSITION_FRACTION = 0.03
+
+# Move the stop to break-even once price is 1.1% in profit...
+RISK_FREE_TRIGGER = 0.011
+# ...placing it 0.15% beyond the entry price
+RISK_FREE_OFFSET = 0.0015
+
+# Default strategy parameters: MACD(fast, slow, signal), SAR(acceleration, maximum), ADX(period, level)
+DEFAULT_INDICATOR_VALUES = [14, 21, 15, 0.02, 0.2, 24, 20.1]
+
+
+def truncate(number: float, digits: int) -> float:
+    """Truncate a number to specified decimal places without rounding."""
+    pow10 = 10 ** digits
+    return number * pow10 // 1 / pow10
+
+
+# ==============================================
+# SIGNALS
+# ==============================================
+
+def macd_signal(hist_current: float, hist_previous: float) -> int:
+    """Buy when the MACD histogram crosses above zero, sell when it crosses below."""
+    if hist_current > 0 > hist_previous:
+        return ORDER_DIRECTION_BUY
+    elif hist_current < 0 < hist_previous:
+        return ORDER_DIRECTION_SELL
+    return 0
+
+def sar_signal(price: float, sar: float) -> int:
+    """Buy while SAR is below price, sell while it is above."""
+    if price < sar:
+        return ORDER_DIRECTION_SELL
+    elif price > sar:
+        return ORDER_DIRECTION_BUY
+    return 0
+
+def adx_signal(adx_value: float, level: float) -> int:
+    """Permit trading (1) only when the trend is strong enough."""
+    return 1 if adx_value > float(level) else 0
+
+def combine_signals(macd_sig: int, sar_sig: int, adx_sig: int) -> int:
+    """Default strategy: MACD cross confirmed by SAR side, filtered by ADX."""
+    if macd_sig == ORDER_DIRECTION_BUY and sar_sig == ORDER_DIRECTION_BUY and adx_sig:
+        return ORDER_DIRECTION_BUY
+    elif macd_sig == ORDER_DIRECTION_SELL and sar_sig == ORDER_DIRECTION_SELL and adx_sig:
+        return ORDER_DIRECTION_SELL
+    return 0
+
+
+# ==============================================
+# ORDER SIZING AND STOPS
+# ==============================================
+
+def order_amount(available: float, price: float, leverage: float, digits: int) -> float:
+    """Position size: POSITION_FRACTION of the available balance times leverage, truncated."""
+    return truncate((available * POSITION_FRACTION) / price * leverage, digits)
+
+def stop_loss_price(side: int, price: float, stoploss: float) -> float:
+    """Initial stop `stoploss` percent away from the entry, on the losing side."""
+    if side == ORDER_DIRECTION_BUY:
+        return price * (1 - stoploss / 100)
+    return price * (1 + stoploss / 100)
+
+def risk_free_stop(side: int, open_price: float, price: float) -> float:
+    """Break-even stop price once the position is far enough in profit, else None."""
+    if side == ORDER_DIRECTION_BUY and price > open_price * (1 + RISK_FREE_TRIGGER):
+        return open_price * (1 + RISK_FREE_OFFSET)
+    elif side == ORDER_DIRECTION_SELL and price < open_price * (1 - RISK_FREE_TRIGGER):
+        return open_price * (1 - RISK_FREE_OFFSET)
+    return None
@@ -0,0 +1,757 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Per-market trading logic.
+
+A MarketTrader holds everything that used to be module state in Main.py
+(market, indicator parameters, leverage, stop-loss, truncation digits and the
+local indicator state), so one process can run many markets side by side on a
+shared CoinexPerpetualApi (one HTTP connection pool, one rate-limit budget).
+"""
+
+import os
+import time
+import datetime
+import logging
+import threading
+import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from termcolor import colored
+import fast_json  # orjson/ujson when installed
+from models import Account, Deal, Position, StopOrder, Ticker
+import indicator_state  # Streaming indicator state for local indicators
+from order_book import OrderBook
+from indicator_cache import IndicatorCache
+from rate_limit import TokenBucket
+import strategy  # Trading rules shared with the backtester
+import signals  # Composable strategies, also run by the backtester
+
+# Number of klines used to warm up local indicators (Coinex maximum is 1000)
+KLINE_LIMIT = 1000
+
+# Number of klines fetched per cycle once local indicators are warm
+KLINE_CATCHUP_LIMIT = 10
+
+# taapi.io requests per second (free plan: one request every 15 seconds)
+TAAPI_RATE = 1 / 15.0
+
+# taapi.io endpoints; the bulk endpoint returns several indicators in one request
+TAAPI_URL = 'https://api.taapi.io/'
+TAAPI_BULK_URL = 'https://api.taapi.io/bulk'
+
+# taapi.io request for the close price of the last closed candles
+TAAPI_CANDLE = ('candle', {'backtracks': 3})
+
+# Indicator results kept until their candle closes, shared by all markets (LRU beyond this size)
+INDICATOR_CACHE_SIZE = 256
+
+# Seconds to wait for a market close to fill before opening the opposite position
+CLOSE_FILL_TIMEOUT = 5
+
+# Number of recent position flips kept for the time-to-flip metric
+FLIP_HISTORY = 100
+
+# Coinex position type used for every market: 1 isolated margin, 2 cross margin
+POSITION_TYPE = 1
+
+# Streamed tickers older than this many seconds are ignored in favour of REST
+STREAM_MAX_AGE = 5
+
+# Bot timeframe -> Coinex kline type
+KLINE_TYPES = {
+    '1m': '1min',
+    '3m': '3min',
+    '5m': '5min',
+    '15m': '15min',
+    '30m': '30min',
+    '1h': '1hour',
+    '2h': '2hour',
+    '4h': '4hour',
+    '6h': '6hour',
+    '12h': '12hour',
+    '1d': '1day',
+    '3d': '3day',
+    '1w': '1week'
+}
+
+# ==============================================
+# UTILITY FUNCTIONS
+# ==============================================
+
+def log_status(message: str, color: str = 'white'):
+    """Log status messages with timestamp and colored output."""
+    timestamp = datetime.datetime.now().replace(microsecond=0)
+    print(colored(f"{message:10} {timestamp}", color), "\n", 70 * "-")
+
+
+def response_data(response):
+    """`data` of a successful Coinex response; None if the request failed or was refused."""
+    if not response or response.get('code') != 0:
+        return None
+    return response['data']
+
+
+# One taapi.io budget for every trader, since they share the API key
+taapi_limiter = TokenBucket(TAAPI_RATE, 1)
+
+# Indicator results cached per candle for every market
+indicator_cache = IndicatorCache(INDICATOR_CACHE_SIZE)
+
+
+def sync_leverage(robot, traders, state_file: str = None) -> list:
+    """
+    Set each trader's leverage only where it differs from the exchange.
+
+    The current setting is taken from the market's open position, else from
+    `state_file`, where the leverage last set by the bot is recorded. The
+    adjustments needed are sent concurrently. Returns the adjusted markets.
+    """
+    current = {}
+    if state_file and os.path.exists(state_file):
+        try:
+            with open(state_file) as f:
+                current = fast_json.loads(f.read())
+        except (OSError, ValueError):
+            current = {}
+    response = robot.query_position_pending()
+    if response and response.get('code') == 0:
+        for position in Position.parse_list(response['data']):
+            current[position.market] = {'leverage': float(position.leverage), 'position_type': position.type}
+
+    def setting(market_trader):
+        return {'leverage': float(market_trader.leverage), 'position_type': POSITION_TYPE}
+
+    pending = [market_trader for market_trader in traders
+               if current.get(market_trader.market) != setting(market_trader)]
+    if not pending:
+        return []
+    with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+        responses = list(executor.map(
+            lambda market_trader: robot.adjust_leverage(market_trader.market, POSITION_TYPE, market_trader.leverage),
+            pending))
+    adjusted = []
+    for market_trader, response in zip(pending, responses):
+        if response and response.get('code') == 0:
+            current[market_trader.market] = setting(market_trader)
+            adjusted.append(market_trader.market)
+        else:
+            logging.error(f"Error adjusting leverage for {market_trader.market}: {response}")
+    if state_file:
+        tmp_path = state_file + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(fast_json.dumps(current))
+        os.replace(tmp_path, state_file)
+    return adjusted
+
+
+class MarketTrader(object):
+    """Trades one market with its own configuration and indicator state."""
+
+    def __init__(self, robot, symbol: str, indicator_values: list, leverage: int = 3, stoploss: float = 5,
+                 timeframe: str = '5m', truncate_digit: int = 2, indicator_source: str = 'local',
+                 indicator_api_key: str = None, state_file: str = None,
+                 async_robot=None, loop_thread=None, market_stream=None, max_slippage_bps=None,
+                 account_cache=None, indicator_bulk=True, strategies=None, market_metadata=None,
+                 candle_store=None):
+        """
+        # params:
+            robot              shared api.CoinexPerpetualApi
+            symbol             market with a slash as used by taapi.io, e.g. ETH/USDT
+            indicator_values   [MACD fast, slow, signal, SAR acceleration, maximum, ADX period, level]
+            indicator_source   'local' (from Coinex klines) or 'taapi'
+            indicator_bulk     with taapi, fetch all indicators of a cycle in one bulk request (falling back
+                               to concurrent single requests bounded by the taapi rate limit)
+            state_file         checkpoint of the local indicator state, may contain {market}
+            async_robot        optional async_api.AsyncCoinexPerpetualApi used to issue independent reads
+                               concurrently, driven by `loop_thread` (async_api.EventLoopThread)
+            market_stream      optional market_stream.MarketStream providing prices from memory
+            max_slippage_bps   skip entries whose estimated slippage versus mid exceeds this (None = no limit)
+            account_cache      optional account_cache.AccountCache shared by all traders; balances, positions,
+                               stop orders and deals are then read from it instead of per-decision REST calls
+            market_metadata    optional market_info.MarketMetadata; order amounts and prices are then
+                               rounded to the market's precisions, `truncate_digit` is the fallback
+            strategies         signals.Strategy list evaluated each cycle (default: signals.default_strategy
+                               with `indicator_values`); the indicators they need are computed once
+            candle_store       optional candle_store.CandleStore the closed klines fetched for the local
+                               indicators are saved to, growing the history used for backtesting
+        """
+        self.robot = robot
+        self.symbol = symbol.upper()
+        self.market = self.symbol.replace("/", "")
+        self.indicator_values = list(indicator_values)
+        self.strategies = list(strategies or [signals.default_strategy(self.indicator_values)])
+        self.indicators = signals.dependencies(self.strategies)
+        self.leverage = leverage
+        self.stoploss = stoploss
+        self.timeframe = timeframe
+        self.truncate_digit = truncate_digit
+        self.market_metadata = market_metadata
+        self.indicator_source = indicator_source
+        self.indicator_api_key = indicator_api_key
+        self.indicator_bulk = indicator_bulk
+        self.taapi_snapshot = None
+        self.state_file = state_file.format(market=self.market) if state_file else None
+        self.async_robot = async_robot
+        self.loop_thread = loop_thread
+        self.market_stream = market_stream
+        self.max_slippage_bps = max_slippage_bps
+        self.account_cache = account_cache
+        self.candle_store = candle_store
+        self.pending_settings = None
+        self.flip_times = deque(maxlen=FLIP_HISTORY)
+        self.risk_stop_position = None  # position_id whose break-even stop is in place
+        self.risk_lock = threading.Lock()  # Held by a risk check or for a whole position flip
+        self.live_indicators = self.restore_live_indicators()
+
+    def log_status(self, message: str, color: str = 'white'):
+        log_status(f"{self.market:10} {message}", color)
+
+    def read_concurrently(self, *calls) -> list:
+        """
+        Issue independent API reads, given as (method name, args) pairs, in one round-trip
+        on the async client when configured; otherwise call them one after another.
+        """
+        if self.async_robot is not None:
+            return self.loop_thread.gather(*(getattr(self.async_robot, name)(*args) for name, args in calls))
+        return [getattr(self.robot, name)(*args) for name, args in calls]
+
+    def stream_price(self) -> float:
+        """Index price from the WebSocket stream if it is fresh, else None (callers fall back to REST)."""
+        if self.market_stream is None:
+            return None
+        return self.market_stream.index_price(self.market, max_age=STREAM_MAX_AGE)
+
+    def slippage_ok(self, side: int, amount: float) -> bool:
+        """Estimate a market order's slippage from the order book and refuse it above max_slippage_bps."""
+        if self.market_stream is not None:
+            book = self.market_stream.book(self.market)
+        elif self.max_slippage_bps is not None:
+            response = self.robot.depth(self.market, 0, 50)
+            if not response or response.get('code') != 0:
+                return True
+            book = OrderBook.from_depth(response['data'], self.market)
+        else:
+            return True
+
+        slippage = book.slippage_bps(side, amount)
+        print(f"{self.market} estimated slippage for {amount}: {slippage} bps\n")
+        if self.max_slippage_bps is not None and (slippage is None or slippage > self.max_slippage_bps):
+            self.log_status("SLIPPAGE", 'red')
+            return False
+        return True
+
+    # ==============================================
+    # ACCOUNT STATE
+    # ==============================================
+
+    def amount_digits(self) -> int:
+        """Order amount decimals from the market metadata, else `truncate_digit`."""
+        if self.market_metadata is None:
+            return self.truncate_digit
+        return self.market_metadata.amount_digits(self.market, self.truncate_digit)
+
+    def round_price(self, price: float) -> float:
+        """Round a price to the market's price precision (unchanged without metadata)."""
+        digits = self.market_metadata.price_digits(self.market) if self.market_metadata is not None else None
+        return price if digits is None else round(price, digits)
+
+    def open_positions(self, fresh_price: float = None):
+        """
+        Open positions of this market and the current index price (from the stream, else REST).
+        Positions come from the shared account cache when configured. Returns (None, None)
+        when the positions, or the price needed with them, could not be read.
+        """
+        robot, market = self.robot, self.market
+        if self.account_cache is not None:
+            position_data = self.account_cache.positions(market)
+            if position_data is None:
+                return None, None
+            if position_data != [] and fresh_price is None:
+                state = response_data(robot.get_market_state(market))
+                if state is None:
+                    return None, None
+                fresh_price = Ticker(state['ticker']).index_price
+            return position_data, fresh_price
+
+        calls = [('query_position_pending', (market,))]
+        if fresh_price is None:
+            calls.append(('get_market_state', (market,)))
+        results = [response_data(response) for response in self.read_concurrently(*calls)]
+        if results[0] is None:
+            return None, None
+        position_data = Position.parse_list(results[0])
+        if position_data != [] and fresh_price is None:
+            if results[1] is None:
+                return None, None
+            fresh_price = Ticker(results[1]['ticker']).index_price
+        return position_data, fresh_price
+
+    def entry_state(self, opposite_side: int):
+        """
+        (side of the last deal, number of pending stop orders, id of the open `opposite_side`
+        position to close or None) ahead of an entry; None if any of them could not be read.
+        """
+        market = self.market
+        if self.account_cache is not None:
+            cache = self.account_cache
+            deals = cache.recent_deals(market)
+            stoploss_exist = cache.stop_order_count(market)
+            positions = cache.positions(market)
+            if deals is None or stoploss_exist is None or positions is None:
+                return None
+            deal = deals[0] if deals else None
+        else:
+            deals, stop_pending, pending = [response_data(response) for response in self.read_concurrently(
+                ('query_user_deals', (market, 0, 1, 0)),
+                ('query_stop_pending', (market, 0, 0, 1)),
+                ('query_position_pending', (market,)))]
+            if deals is None or stop_pending is None or pending is None:
+                return None
+            records = deals['records']
+            deal = Deal(records[0]) if records else None
+            stoploss_exist = int(stop_pending['total'])
+            positions = Position.parse_list(pending)
+        position_id = next((position.position_id for position in positions if position.side == opposite_side), None)
+        return deal.side if deal else None, stoploss_exist, position_id
+
+    def balance_and_price(self):
+        """Available USDT and the current index price, read together; (None, None) if either failed."""
+        robot, market = self.robot, self.market
+        index_price = self.stream_price()
+        if self.account_cache is not None:
+            available = self.account_cache.available('USDT')
+            if available is None:
+                return None, None
+            if index_price is None:
+                state = response_data(robot.get_market_state(market))
+                if state is None:
+                    return None, None
+                index_price = Ticker(state['ticker']).index_price
+            return available, index_price
+
+        calls = [('query_account', ())]
+        if index_price is None:
+            calls.append(('get_market_state', (market,)))
+        results = [response_data(response) for response in self.read_concurrently(*calls)]
+        if any(data is None for data in results):
+            return None, None
+        available = Account(results[0]['USDT'], 'USDT').available
+        if index_price is None:
+            index_price = Ticker(results[1]['ticker']).index_price
+        return available, index_price
+
+    def acknowledged(self, response):
+        """Pass an order response through, invalidating the cached account state it changed."""
+        if self.account_cache is not None:
+            self.account_cache.on_order_ack(self.market, response)
+        return response
+
+    # ==============================================
+    # TRADING FUNCTIONS
+    # ==============================================
+
+    def enter(self, side: int, amount: float, stop_price: float) -> bool:
+        """Submit the entry and its stop-loss concurrently and confirm both landed."""
+        result = self.acknowledged(self.robot.put_bracket_order(self.market, side, amount, stop_price, stop_type=3))
+        if not result['ok']:
+            logging.error(f"{self.market} entry not confirmed: {result}")
+            entry = result['entry']
+            self.log_status("UNPROTECTED" if entry and entry.get('code') == 0 else "ORDER FAILED", 'red')
+        return result['ok']
+
+    def close_position(self, position_id) -> bool:
+        """Close a position at market and wait until the close order has filled."""
+        response = self.acknowledged(self.robot.close_market(self.market, position_id))
+        if not response or response.get('code') != 0:
+            logging.error(f"{self.market} closing position {position_id} failed: {response}")
+            return False
+        order_id = response['data'].get('order_id')
+        if order_id and self.robot.wait_for_order(self.market, order_id, timeout=CLOSE_FILL_TIMEOUT) is None:
+            logging.warning(f"{self.market} close order {order_id} not filled after {CLOSE_FILL_TIMEOUT}s")
+            return False
+        return True
+
+    def record_flip(self, seconds: float):
+        """Time from closing a position to the opposite entry being confirmed."""
+        self.flip_times.append(seconds)
+        print(f"{self.market} time to flip: {seconds:.3f}s\n")
+
+    def flip_stats(self) -> dict:
+        """Count, average and worst time-to-flip over the recent flips."""
+        times = list(self.flip_times)
+        if not times:
+            return {'flips': 0, 'avg': None, 'max': None}
+        return {'flips': len(times), 'avg': sum(times) / len(times), 'max': max(times)}
+
+    def risk_free(self, price: float = None):
+        """
+        Implement risk-free trading by setting a stop order once price moves favorably.
+
+        Idempotent and cheap enough to run on every price update: the stop is placed
+        once per position, and a call while another check or a position flip is running
+        returns at once.
+        """
+        if not self.risk_lock.acquire(blocking=False):
+            return
+        try:
+            robot, market = self.robot, self.market
+            position_data, fresh_price = self.open_positions(price if price is not None else self.stream_price())
+            if position_data is None:
+                return  # Exchange unreachable or refusing; check again on the next update
+            if position_data == []:
+                self.risk_stop_position = None
+                return
+
+            position = position_data[0]
+            if position.position_id == self.risk_stop_position:
+                return
+            open_price, side, amount = position.open_price, position.side, position.amount
+
+            # After 1.1% profit, set a stop 0.15% beyond entry on the closing side
+            stop_price = strategy.risk_free_stop(side, open_price, fresh_price)
+            if stop_price is None:
+                return
+            stop_price = self.round_price(stop_price)
+            close_side = robot.ORDER_DIRECTION_SELL if side == robot.ORDER_DIRECTION_BUY else robot.ORDER_DIRECTION_BUY
+            if not self.position_still_open(position.position_id):
+                return
+            pending = self.stop_pending(close_side, stop_price)
+            if pending is None:
+                return  # Unknown whether the stop exists; placing it could duplicate it
+            if not pending:
+                response = self.acknowledged(robot.put_stop_market_order(market, close_side, amount, stop_price, 3))
+                if not response or response.get('code') != 0:
+                    return
+            self.risk_stop_position = position.position_id
+        finally:
+            self.risk_lock.release()
+
+    def position_still_open(self, position_id) -> bool:
+        """Confirm against the exchange (not the cache) that a position is open before protecting it."""
+        response = self.robot.query_position_pending(self.market)
+        if not response or response.get('code') != 0:
+            return False
+        return any(position.position_id == position_id for position in Position.parse_list(response['data']))
+
+    def stop_pending(self, side: int, stop_price: float) -> bool:
+        """
+        Whether a stop order on `side` at `stop_price` is already pending (e.g. placed before a
+        restart); None if the pending stops could not be read.
+        """
+        response = self.robot.query_stop_pending(self.market, side, 0, 100)
+        if not response or response.get('code') != 0:
+            return None
+        return any(abs(stop.stop_price - stop_price) <= stop_price * self.robot.STOP_MATCH_TOLERANCE
+                   for stop in StopOrder.parse_list(response['data'].get('records')))
+
+    def market_sell(self):
+        """Execute market sell order with 3% of account balance and set stoploss."""
+        # Risk checks skip while the stops are cancelled and the position is replaced, so no
+        # break-even stop for the old position can land in between
+        with self.risk_lock:
+            robot, market = self.robot, self.market
+            state = self.entry_state(robot.ORDER_DIRECTION_BUY)
+            if state is None:
+                self.log_status("NO DATA", 'yellow')
+                return
+            position_type, stoploss_exist, position_id = state
+
+            if position_type == 2 or not stoploss_exist:
+                # Close opposite position if exists and continue as soon as the close has filled
+                flip_started = time.perf_counter()
+                if position_id is not None and not self.close_position(position_id):
+                    # Entering now would open the new side next to the old position, which
+                    # keeps its stops since they are only cancelled once it is closed
+                    self.log_status("CLOSE FAILED", 'red')
+                    return
+
+                self.acknowledged(robot.cancel_all_stop_order(market))
+                self.risk_stop_position = None  # Any break-even stop is gone with the cancelled orders
+
+                # Calculate order size (3% of available balance)
+                available, index_price = self.balance_and_price()
+                if index_price is None:
+                    self.log_status("NO DATA", 'yellow')
+                    return
+                order_amount = strategy.order_amount(available, index_price, self.leverage, self.amount_digits())
+                stop_price = strategy.stop_loss_price(robot.ORDER_DIRECTION_SELL, index_price, self.stoploss)
+                stop_price = self.round_price(stop_price)
+                if not self.slippage_ok(robot.ORDER_DIRECTION_SELL, order_amount):
+                    return
+
+                # Place sell order and stoploss together
+                self.enter(robot.ORDER_DIRECTION_SELL, order_amount, stop_price)
+                if position_id is not None:
+                    self.record_flip(time.perf_counter() - flip_started)
+
+    def market_buy(self):
+        """Execute market buy order with 3% of account balance and set stoploss."""
+        # Risk checks skip while the stops are cancelled and the position is replaced, so no
+        # break-even stop for the old position can land in between
+        with self.risk_lock:
+            robot, market = self.robot, self.market
+            state = self.entry_state(robot.ORDER_DIRECTION_SELL)
+            if state is None:
+                self.log_status("NO DATA", 'yellow')
+                return
+            position_type, stoploss_exist, position_id = state
+
+            if position_type == 1 or not stoploss_exist:
+                # Close opposite position if exists and continue as soon as the close has filled
+                flip_started = time.perf_counter()
+                if position_id is not None and not self.close_position(position_id):
+                    # Entering now would open the new side next to the old position, which
+                    # keeps its stops since they are only cancelled once it is closed
+                    self.log_status("CLOSE FAILED", 'red')
+                    return
+
+                self.acknowledged(robot.cancel_all_stop_order(market))
+                self.risk_stop_position = None  # Any break-even stop is gone with the cancelled orders
+
+                # Calculate order size (3% of available balance)
+                available, index_price = self.balance_and_price()
+                if index_price is None:
+                    self.log_status("NO DATA", 'yellow')
+                    return
+                order_amount = strategy.order_amount(available, index_price, self.leverage, self.amount_digits())
+                stop_price = strategy.stop_loss_price(robot.ORDER_DIRECTION_BUY, index_price, self.stoploss)
+                stop_price = self.round_price(stop_price)
+                if not self.slippage_ok(robot.ORDER_DIRECTION_BUY, order_amount):
+                    return
+
+                # Place buy order and stoploss together
+                self.enter(robot.ORDER_DIRECTION_BUY, order_amount, stop_price)
+                if position_id is not None:
+                    self.record_flip(time.perf_counter() - flip_started)
+
+    # ==============================================
+    # TECHNICAL INDICATOR FUNCTIONS
+    # ==============================================
+
+    def taapi_indicators(self) -> dict:
+        """taapi.io id -> (indicator, parameters) for the strategies' indicators and the close price."""
+        requests_by_id = {spec.id: spec.taapi() for spec in self.indicators}
+        requests_by_id['candle'] = TAAPI_CANDLE
+        return requests_by_id
+
+    def indicator_key(self, source: str, indicator: str, params: dict) -> tuple:
+        """indicator_cache key and expiry of an indicator on this market's current candle."""
+        return indicator_cache.key(source, indicator, params, self.symbol, KLINE_TYPES[self.timeframe])
+
+    def get_indicator_data(self, indicator: str, params: dict) -> dict:
+        """Indicator data from taapi.io, fetched at most once per candle."""
+        key, expires = self.indicator_key('taapi', indicator, params)
+        return indicator_cache.get_or_compute(key, expires, lambda: self.fetch_indicator_data(indicator, params))
+
+    def fetch_indicator_data(self, indicator: str, params: dict) -> dict:
+        """Fetch indicator data from taapi.io API with error handling."""
+        endpoint = TAAPI_URL + indicator
+        params = dict(params, secret=self.indicator_api_key, exchange='binance',
+                      symbol=self.symbol, interval=self.timeframe)
+
+        try:
+            taapi_limiter.acquire()
+            response = requests.get(endpoint, params=params)
+            response.raise_for_status()
+            return fast_json.loads(response.content)
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Error fetching {indicator} data: {str(e)}")
+            return None
+
+    def get_indicator_bulk(self, ids) -> dict:
+        """Fetch several indicators in one taapi.io bulk request; id -> results ordered by backtrack."""
+        indicators = self.taapi_indicators()
+        payload = {
+            'secret': self.indicator_api_key,
+            'construct': {
+                'exchange': 'binance',
+                'symbol': self.symbol,
+                'interval': self.timeframe,
+                'indicators': [dict(indicators[id][1], indicator=indicators[id][0], id=id) for id in ids]
+            }
+        }
+        try:
+            taapi_limiter.acquire()
+            response = requests.post(TAAPI_BULK_URL, data=fast_json.dumps(payload),
+                                     headers={'Content-Type': 'application/json'})
+            response.raise_for_status()
+            results = {}
+            for item in fast_json.loads(response.content)['data']:
+                if item.get('errors'):
+                    logging.error(f"taapi.io {item.get('id')}: {item['errors']}")
+                    continue
+                result = item['result']
+                if isinstance(result, list):
+                    result = sorted(result, key=lambda row: row.get('backtrack', 0))
+                results[item['id']] = result
+            return results
+        except (requests.exceptions.RequestException, KeyError, TypeError, ValueError) as e:
+            logging.error(f"Error fetching taapi.io bulk data: {str(e)}")
+            return None
+
+    def fetch_taapi_snapshot(self, ids=None) -> dict:
+        """
+        Every indicator of a cycle in one round-trip: a bulk request, then concurrent single
+        requests, each waiting for the shared taapi.io rate limit, for whatever it did not return.
+        """
+        indicators = self.taapi_indicators()
+        ids = list(ids or indicators)
+        keys = {id: self.indicator_key('taapi', *indicators[id]) for id in ids}
+        results = {}
+        for id in ids:
+            result = indicator_cache.get(keys[id][0])
+            if result is not None:
+                results[id] = result
+        missing = [id for id in ids if id not in results]
+        if not missing:
+            return results
+
+        if self.indicator_bulk:
+            fetched = self.get_indicator_bulk(missing) or {}
+            for id in missing:
+                if id in fetched:
+                    indicator_cache.put(keys[id][0], fetched[id], keys[id][1])
+                    results[id] = fetched[id]
+            missing = [id for id in missing if id not in results]
+            if not missing:
+                return results
+        with ThreadPoolExecutor(max_workers=len(missing)) as executor:
+            data = executor.map(lambda id: self.get_indicator_data(*indicators[id]), missing)
+            results.update((id, result) for id, result in zip(missing, data) if result)
+        return results
+
+    def taapi_data(self, id: str):
+        """Data of one taapi.io indicator from this cycle's snapshot, fetched on its own if missing."""
+        if self.taapi_snapshot is not None and id in self.taapi_snapshot:
+            return self.taapi_snapshot[id]
+        return self.get_indicator_data(*self.taapi_indicators()[id])
+
+    def build_live_indicators(self) -> indicator_state.IndicatorSet:
+        """Create empty streaming indicators for the indicators the strategies need."""
+        return indicator_state.IndicatorSet(
+            {spec.id: spec.state() for spec in self.indicators},
+            meta={'market': self.market, 'timeframe': self.timeframe,
+                  'indicators': [spec.id for spec in self.indicators]})
+
+    def restore_live_indicators(self) -> indicator_state.IndicatorSet:
+        """Restore indicator state from the checkpoint if it matches the current configuration."""
+        fresh = self.build_live_indicators()
+        if self.state_file:
+            try:
+                restored = indicator_state.IndicatorSet.load(self.state_file)
+                if restored.meta == fresh.meta:
+                    return restored
+            except (OSError, ValueError, KeyError):
+                pass
+        return fresh
+
+    def update_live_indicators(self) -> bool:
+        """Feed klines closed since the last update into the local indicators."""
+        warm = self.live_indicators.last_time is not None
+        response = self.robot.kline(self.market, KLINE_TYPES[self.timeframe], KLINE_CATCHUP_LIMIT if warm else KLINE_LIMIT)
+        if not response or response.get('code') != 0:
+            logging.error(f"Error fetching klines for {self.market}: {response}")
+            return False
+        rows = response['data'][:-1]  # The last kline is the candle still open
+
+        # Missed more candles than one catch-up fetch covers: warm up from scratch
+        if warm and rows and rows[0][0] > self.live_indicators.last_time:
+            self.live_indicators = self.build_live_indicators()
+            return self.update_live_indicators()
+
+        if self.candle_store is not None:
+            try:
+                self.candle_store.store(self.market, KLINE_TYPES[self.timeframe], rows)
+            except (OSError, ValueError) as e:
+                logging.error(f"Error storing klines for {self.market}: {e}")
+
+        if self.live_indicators.update_from_kline(rows) and self.state_file:
+            self.live_indicators.save(self.state_file)
+        return self.live_indicators.last_time is not None
+
+    def indicator_snapshot(self) -> signals.Snapshot:
+        """Values of the strategies' indicators on the last closed candle."""
+        if self.indicator_source == 'local':
+            live = self.live_indicators
+            values = {spec: spec.read_state(live[spec.id]) for spec in self.indicators}
+            return signals.Snapshot(live.last_close, values)
+
+        values = {}
+        for spec in self.indicators:
+            data = self.taapi_data(spec.id)
+            values[spec] = spec.read_taapi(data) if data else signals.MISSING
+        candle = self.taapi_data('candle')
+        return signals.Snapshot(float(candle[1]['close']) if candle else None, values)
+
+    # ==============================================
+    # TRADING STRATEGY
+    # ==============================================
+
+    def reconfigure(self, indicator_values=None, strategies=None, stoploss=None, leverage=None):
+        """
+        Change settings while running. Stop-loss and leverage apply to the next order (the exchange
+        leverage is set by sync_leverage()); indicators and strategies switch at the start of the next cycle.
+        """
+        if stoploss is not None:
+            self.stoploss = stoploss
+        if leverage is not None:
+            self.leverage = leverage
+        if indicator_values is not None or strategies is not None:
+            self.pending_settings = {'indicator_values': list(indicator_values or self.indicator_values),
+                                     'strategies': strategies}
+
+    def apply_settings(self):
+        settings, self.pending_settings = self.pending_settings, None
+        if not settings:
+            return
+        self.indicator_values = settings['indicator_values']
+        self.strategies = list(settings['strategies'] or [signals.default_strategy(self.indicator_values)])
+        indicators = signals.dependencies(self.strategies)
+        if indicators != self.indicators:
+            # Indicators not seen before warm up from the klines on this cycle
+            self.indicators = indicators
+            self.live_indicators = self.restore_live_indicators()
+        self.log_status("RECONFIGURED", 'cyan')
+
+    def signal_helper(self):
+        """Main trading strategy that combines indicators to generate signals."""
+        try:
+            self.apply_settings()
+            self.risk_free()  # Manage risk for open positions
+
+            # Bring local indicators up to date with the candles closed since the last cycle
+            # (once per candle: a repeated cycle within the candle reuses the update)
+            if self.indicator_source == 'local':
+                ids = [spec.id for spec in self.indicators]
+                key, expires = self.indicator_key('local', 'update', {'indicators': ids})
+                if not indicator_cache.get_or_compute(key, expires, lambda: self.update_live_indicators() or None):
+                    self.log_status("NO DATA", 'yellow')
+                    return
+
+            # Fetch this cycle's taapi.io indicators together
+            if self.indicator_source != 'local':
+                self.taapi_snapshot = self.fetch_taapi_snapshot()
+
+            # Evaluate every strategy on one snapshot of their indicators
+            snapshot = self.indicator_snapshot()
+            for spec in self.indicators:
+                print(f"{self.market} {spec!r}:", snapshot[spec].value, "\n")
+
+            # Execute trades based on combined signals
+            signal = signals.decide(self.strategies, snapshot)
+            if signal == self.robot.ORDER_DIRECTION_BUY:
+                self.market_buy()
+                self.log_status("BUY", 'green')
+            elif signal == self.robot.ORDER_DIRECTION_SELL:
+                self.market_sell()
+                self.log_status("SELL", 'red')
+            else:
+                self.log_status("NO SIGNAL", 'yellow')
+
+        except Exception as e:
+            logging.error(traceback.format_exc())
+            self.log_status("ERROR", 'red')
+        finally:
+            self.taapi_snapshot = None